@@ -0,0 +1,34 @@
+# ---------------------------------------------
+# atomic_file.py — write a file so readers never see half of it
+# The data goes to a temp file next to the target, which is then renamed
+# over it (os.replace is atomic on the same file system). A crash leaves
+# either the old file or the new one, plus at most a stray temp file.
+#
+#   with atomic_write("calibration.json") as f:
+#       json.dump(calib, f)
+# ---------------------------------------------
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode="w", fsync=False):
+    """
+    Opens a temp file for writing and renames it to `path` on success; on an
+    exception the temp file is removed and `path` is left untouched.
+    fsync=True: the data is on disk before the rename (survives a power cut).
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"   # one writer per process, never a shared name
+    try:
+        with open(tmp, mode) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,46 @@
+# ---------------------------------------------
+# bench_coord_transform.py — scalar vs batch homography
+# Run:  python bench_coord_transform.py
+# ---------------------------------------------
+import time
+
+import numpy as np
+
+from coord_transform import camera_to_robot, camera_to_robot_batch, robot_to_camera_batch
+
+SIZES = [10, 1_000, 1_000_000]
+REPEATS = 5
+
+
+def best_time(fn, repeats=REPEATS):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+rng = np.random.default_rng(0)
+
+print(f"{'points':>10} {'scalar':>12} {'batch':>12} {'speedup':>9} {'max err mm':>11}")
+for n in SIZES:
+    pts = rng.uniform([0, 0], [960, 540], size=(n, 2))
+    out = np.empty_like(pts)
+
+    # scalar path once at 1M is already several seconds
+    repeats = 1 if n >= 1_000_000 else REPEATS
+    t_scalar = best_time(lambda: [camera_to_robot(u, v) for u, v in pts], repeats)
+    t_batch = best_time(lambda: camera_to_robot_batch(pts, out))
+
+    sample = pts[:1000]
+    ref = np.array([camera_to_robot(u, v) for u, v in sample])
+    err = np.abs(camera_to_robot_batch(sample) - ref).max()
+
+    print(f"{n:>10} {t_scalar * 1e3:>10.2f}ms {t_batch * 1e3:>10.3f}ms "
+          f"{t_scalar / t_batch:>8.0f}x {err:>11.2e}")
+
+# round trip through the inverse
+pts = rng.uniform([0, 0], [960, 540], size=(1000, 2))
+back = robot_to_camera_batch(camera_to_robot_batch(pts))
+print(f"\nRound trip camera → robot → camera, max error: {np.abs(back - pts).max():.2e} px")
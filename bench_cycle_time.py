@@ -0,0 +1,147 @@
+# ---------------------------------------------
+# bench_cycle_time.py — end-to-end cycle time of robot.py on the simulator
+# Runs auto_stack / config_mode against mock_cherrybot with realistic move
+# timing and splits the wall-clock time into where it actually goes.
+#
+#   python bench_cycle_time.py
+#   python bench_cycle_time.py --latency 0.03 --jitter 0.02 --fault-rate 0.02
+#   python bench_cycle_time.py --mode auto --repeat 3
+# ---------------------------------------------
+import argparse
+import os
+import tempfile
+import time
+import types
+
+import numpy as np
+
+import robot
+from coord_transform import robot_to_camera_batch
+from detection_channel import publish
+from mock_cherrybot import start_mock_server
+
+# Free cans on the table for auto_stack, robot coords in mm
+SCENE = [(-20, -380), (60, -300), (130, -420), (200, -330)]
+
+
+class Breakdown:
+    """Wraps robot.py's blocking calls and adds up the time spent in each."""
+
+    def __init__(self, state):
+        self.state = state
+        self.totals = dict.fromkeys(("motion wait", "gripper settle", "operator wait", "http"), 0.0)
+        self.calls = 0
+        self._in_wait = False
+        self._patch()
+
+    def _patch(self):
+        wait_until_arrived = robot.wait_until_arrived
+        request = robot.client.request
+
+        def timed_wait(*args, **kwargs):
+            self._in_wait = True
+            t0 = time.perf_counter()
+            try:
+                return wait_until_arrived(*args, **kwargs)
+            finally:
+                self.totals["motion wait"] += time.perf_counter() - t0
+                self._in_wait = False
+
+        def timed_sleep(seconds):
+            t0 = time.perf_counter()
+            time.sleep(seconds)
+            if self._in_wait:
+                return      # polling pause, already counted as motion wait
+            key = "gripper settle" if seconds == robot.GRIPPER_SETTLE else "operator wait"
+            self.totals[key] += time.perf_counter() - t0
+
+        def timed_request(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return request(*args, **kwargs)
+            finally:
+                self.calls += 1
+                if not self._in_wait:
+                    self.totals["http"] += time.perf_counter() - t0
+
+        robot.wait_until_arrived = timed_wait
+        robot.client.request = timed_request
+        # robot.py only uses time.sleep / monotonic / time; swap in a module with a timed sleep
+        robot.time = types.SimpleNamespace(**{k: getattr(time, k) for k in dir(time) if not k.startswith("_")})
+        robot.time.sleep = timed_sleep
+
+    def measure(self, fn):
+        for k in self.totals:
+            self.totals[k] = 0.0
+        self.calls = 0
+        motion0 = self.state.motion_time
+
+        t0 = time.perf_counter()
+        fn()
+        wall = time.perf_counter() - t0
+        return wall, dict(self.totals), self.state.motion_time - motion0, self.calls
+
+
+def publish_scene(scene=SCENE):
+    px = robot_to_camera_batch(np.array(scene, dtype=float))
+    publish([(u, v, 1.0) for u, v in px], source="bench_cycle_time")
+
+
+def report(name, wall, totals, moving, calls):
+    print(f"\n⏱️ {name}: {wall:.2f} s wall clock, {calls} HTTP calls")
+    print(f"   {'':<18}{'s':>8}{'share':>8}")
+    for key, s in totals.items():
+        print(f"   {key:<18}{s:>8.2f}{s / wall:>8.1%}")
+    rest = wall - sum(totals.values())
+    print(f"   {'other (plan, io)':<18}{rest:>8.2f}{rest / wall:>8.1%}")
+
+    wait = totals["motion wait"]
+    print(f"   arm moving {moving:.2f} s (simulator) → {max(wait - moving, 0):.2f} s of motion wait is polling / settling overhead")
+    if totals["operator wait"]:
+        print(f"   robot cycle without the operator: {wall - totals['operator wait']:.2f} s")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Cycle time of robot.py against the simulated cherrybot")
+    p.add_argument("--mode", choices=("auto", "config", "all"), default="all")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--latency", type=float, default=0.0, help="s added to every request")
+    p.add_argument("--jitter", type=float, default=0.0, help="s of random extra latency")
+    p.add_argument("--fault-rate", type=float, default=0.0, help="share of requests that get a 503")
+    args = p.parse_args()
+
+    server, url = start_mock_server(instant=False, latency=args.latency,
+                                    jitter=args.jitter, fault_rate=args.fault_rate)
+    robot.client.base_url = url
+    robot.client.post_operator("Bench", "bench@example.com")
+    print(f"🧪 Simulator at {url}")
+
+    # Keep the detection file away from the real one
+    os.chdir(tempfile.mkdtemp(prefix="cycle-bench-"))
+
+    bench = Breakdown(server.state)
+    runs = []
+    if args.mode in ("auto", "all"):
+        def auto():
+            publish_scene()
+            robot.auto_stack()
+        runs.append(("auto_stack", auto))
+    if args.mode in ("config", "all"):
+        runs.append(("config_mode", robot.config_mode))
+
+    results = []
+    for name, fn in runs:
+        for k in range(args.repeat):
+            wall, totals, moving, calls = bench.measure(fn)
+            results.append((f"{name} #{k + 1}", wall, totals, moving, calls))
+
+    print("\n" + "=" * 60)
+    for r in results:
+        report(*r)
+
+    robot.log_off()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
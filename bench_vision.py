@@ -0,0 +1,267 @@
+# ---------------------------------------------
+# bench_vision.py — replay recorded frames through the detectors
+# Reports per-stage latency, FPS and precision / recall against labels.
+#
+#   python bench_vision.py --frames recordings/run1/ --labels recordings/run1/labels.json
+#   python bench_vision.py --frames table.mp4 --param2 25 --min-radius 37
+#   python bench_vision.py --synthetic 100          # no recordings needed
+#   python bench_vision.py --synthetic 50 --compare # every can backend, same frames
+#   python bench_vision.py --frames run1/ --backend contour --coarse-scale 0.5
+#
+# labels.json: { "<file name or frame index>": {"cans": [[x, y], ...],
+#                                                "black": [[x, y], ...]} }
+# in FRAME_SIZE (960×540) pixels.
+# ---------------------------------------------
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import can_detection
+import object_detection as od
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+# -----------------------------------------
+# Input
+# -----------------------------------------
+def load_frames(path, max_frames=None):
+    """[(name, BGR frame), ...] from an image folder or a video file."""
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                frames.append((name, cv2.imread(os.path.join(path, name))))
+                if max_frames and len(frames) >= max_frames:
+                    break
+        return frames
+
+    cap = cv2.VideoCapture(path)
+    while not max_frames or len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append((str(len(frames)), frame))
+    cap.release()
+    return frames
+
+
+def load_labels(path):
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def synthetic(n, seed=0, size=(1920, 1080)):
+    """Camera-like frames with a few cans and black boxes, plus their labels."""
+    rng = np.random.default_rng(seed)
+    sx = size[0] / od.FRAME_SIZE[0]
+    frames, labels = [], {}
+
+    for k in range(n):
+        img = rng.normal(150, 12, (size[1], size[0], 3)).clip(0, 255).astype(np.uint8)
+        img = cv2.GaussianBlur(img, (5, 5), 0)
+
+        cans = []
+        for _ in range(rng.integers(1, 6)):
+            x, y = rng.uniform(80, 880), rng.uniform(80, 330)
+            if all(np.hypot(x - cx, y - cy) > 110 for cx, cy in cans):
+                cans.append((x, y))
+                r = rng.uniform(can_detection.RADIUS_MIN + 0.5, can_detection.RADIUS_MAX - 0.5)
+                c = (int(x * sx), int(y * sx))
+                cv2.circle(img, c, int(r * sx), (110, 110, 110), -1)
+                cv2.circle(img, c, int(r * sx * 0.75), (160, 160, 160), int(4 * sx))
+
+        black = []
+        for _ in range(rng.integers(0, 3)):
+            x, y = rng.uniform(100, 860), rng.uniform(400, 480)
+            w, h = rng.uniform(40, 80), rng.uniform(30, 50)
+            if all(abs(x - bx) > 100 for bx, _ in black):
+                black.append((x, y))
+                p0 = (int((x - w / 2) * sx), int((y - h / 2) * sx))
+                p1 = (int((x + w / 2) * sx), int((y + h / 2) * sx))
+                cv2.rectangle(img, p0, p1, (15, 15, 15), -1)
+
+        frames.append((str(k), cv2.GaussianBlur(img, (7, 7), 0)))
+        labels[str(k)] = {"cans": cans, "black": black}
+
+    return frames, labels
+
+
+# -----------------------------------------
+# Scoring
+# -----------------------------------------
+def match(detected, truth, tol):
+    """Greedy nearest matching within `tol` px. Returns (tp, fp, fn, [centre errors])."""
+    detected = [tuple(d[:2]) for d in detected]
+    truth = [tuple(t[:2]) for t in truth]
+    pairs = sorted(
+        (np.hypot(d[0] - t[0], d[1] - t[1]), i, j)
+        for i, d in enumerate(detected) for j, t in enumerate(truth)
+    )
+
+    used_d, used_t, errors = set(), set(), []
+    for dist, i, j in pairs:
+        if dist > tol:
+            break
+        if i in used_d or j in used_t:
+            continue
+        used_d.add(i)
+        used_t.add(j)
+        errors.append(dist)
+
+    tp = len(errors)
+    return tp, len(detected) - tp, len(truth) - tp, errors
+
+
+class Score:
+    def __init__(self):
+        self.tp = self.fp = self.fn = 0
+        self.errors = []
+
+    def add(self, result):
+        tp, fp, fn, errors = result
+        self.tp += tp
+        self.fp += fp
+        self.fn += fn
+        self.errors += errors
+
+    def report(self):
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+        err = np.mean(self.errors) if self.errors else float("nan")
+        return f"precision {precision:.3f}  recall {recall:.3f}  centre error {err:.2f} px  (tp {self.tp}, fp {self.fp}, fn {self.fn})"
+
+
+# -----------------------------------------
+# Timed pipeline
+# -----------------------------------------
+class StageTimes:
+    def __init__(self):
+        self.samples = {}
+
+    def run(self, stage, fn, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        self.samples.setdefault(stage, []).append((time.perf_counter() - t0) * 1e3)
+        return out
+
+    def report(self):
+        lines = [f"{'stage':<16}{'mean ms':>10}{'p50':>10}{'p95':>10}"]
+        total = 0.0
+        for stage, ms in self.samples.items():
+            ms = np.array(ms)
+            total += ms.mean()
+            lines.append(f"{stage:<16}{ms.mean():>10.3f}{np.percentile(ms, 50):>10.3f}{np.percentile(ms, 95):>10.3f}")
+        lines.append(f"{'total':<16}{total:>10.3f}    → {1e3 / total:.1f} FPS")
+        return "\n".join(lines)
+
+
+def run(frames, labels, hough_params, tol, black=True, drawing=True, detector=None):
+    """detector: a can_detection.CanDetector to use instead of Hough with `hough_params`."""
+    times = StageTimes()
+    cans, blacks = Score(), Score()
+
+    for name, frame in frames:
+        small = times.run("resize", cv2.resize, frame, od.FRAME_SIZE)
+        if detector is not None:
+            circles = times.run(f"cans ({detector.backend})", detector.detect, small)
+        else:
+            gray = times.run("grayscale", cv2.cvtColor, small, cv2.COLOR_BGR2GRAY)
+            blur = times.run("median blur", cv2.medianBlur, gray, 7)
+            circles = times.run("hough", od.hough_circles, blur, hough_params)
+
+        boxes = od.no_boxes()
+        if black:
+            mask = times.run("black threshold", od.black_threshold, small)
+            mask = times.run("morphology", od.clean_mask, mask)
+            boxes = times.run("components", od.black_boxes, mask)
+
+        if drawing:
+            times.run("drawing", lambda: od.draw(small.copy(), circles, boxes))
+
+        if labels and name in labels:
+            truth = labels[name]
+            cans.add(match(circles, truth.get("cans", []), tol))
+            if black:
+                blacks.add(match(boxes[:, 5:7], truth.get("black", []), tol))
+
+    return times, cans, blacks
+
+
+def compare(frames, labels, tol, coarse_scale=None):
+    """Every registered can backend on the same frames: accuracy and speed side by side."""
+    print(f"{'backend':<12}{'ms/frame':>10}{'FPS':>8}  accuracy")
+    for name in can_detection.BACKENDS:
+        detector = can_detection.CanDetector(coarse_scale=coarse_scale, backend=name)
+        times, cans, _ = run(frames, labels, None, tol, black=False, drawing=False, detector=detector)
+        ms = np.mean(times.samples[f"cans ({name})"])
+        print(f"{name:<12}{ms:>10.2f}{1e3 / ms:>8.1f}  {cans.report() if labels else '-'}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Offline benchmark for the vision pipeline")
+    p.add_argument("--frames", help="image folder or video file")
+    p.add_argument("--labels", help="ground truth JSON")
+    p.add_argument("--synthetic", type=int, default=0, help="generate N labelled frames instead")
+    p.add_argument("--max-frames", type=int)
+    p.add_argument("--repeat", type=int, default=1, help="replay the frames this many times")
+    p.add_argument("--tol", type=float, default=8.0, help="match distance in px")
+    p.add_argument("--no-black", action="store_true", help="skip the black object detector")
+    p.add_argument("--no-draw", action="store_true", help="skip the overlay drawing stage")
+    p.add_argument("--backend", choices=sorted(can_detection.BACKENDS),
+                   help="use this can_detection backend instead of the Hough settings below")
+    p.add_argument("--coarse-scale", type=float, help="with --backend / --compare: detect at this scale, refine")
+    p.add_argument("--compare", action="store_true", help="compare all can backends")
+
+    # Hough settings, default = the can detector
+    p.add_argument("--dp", type=float, default=can_detection.HOUGH_PARAMS["dp"])
+    p.add_argument("--min-dist", type=float, default=can_detection.HOUGH_PARAMS["minDist"])
+    p.add_argument("--param1", type=float, default=can_detection.HOUGH_PARAMS["param1"])
+    p.add_argument("--param2", type=float, default=can_detection.HOUGH_PARAMS["param2"])
+    p.add_argument("--min-radius", type=int, default=can_detection.RADIUS_MIN)
+    p.add_argument("--max-radius", type=int, default=can_detection.RADIUS_MAX)
+    args = p.parse_args()
+
+    if args.synthetic:
+        frames, labels = synthetic(args.synthetic)
+    elif args.frames:
+        frames, labels = load_frames(args.frames, args.max_frames), load_labels(args.labels)
+    else:
+        p.error("give --frames or --synthetic")
+
+    if not frames:
+        print("❌ No frames found.")
+        return
+
+    if args.compare:
+        print(f"🎞️ {len(frames)} frames × {args.repeat}, coarse scale {args.coarse_scale}\n")
+        compare(frames * args.repeat, labels, args.tol, args.coarse_scale)
+        return
+
+    detector = None
+    if args.backend:
+        detector = can_detection.CanDetector(coarse_scale=args.coarse_scale, backend=args.backend)
+
+    hough_params = dict(dp=args.dp, minDist=args.min_dist, param1=args.param1, param2=args.param2,
+                        minRadius=args.min_radius, maxRadius=args.max_radius)
+    print(f"🎞️ {len(frames)} frames × {args.repeat}, "
+          f"{'backend ' + args.backend if detector else f'Hough {hough_params}'}\n")
+
+    times, cans, blacks = run(frames * args.repeat, labels, hough_params, args.tol,
+                              black=not args.no_black, drawing=not args.no_draw, detector=detector)
+
+    print(times.report())
+    if labels:
+        print(f"\n⭕ cans:  {cans.report()}")
+        if not args.no_black:
+            print(f"⬛ black: {blacks.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+# ---------------------------------------------
+# can_detection.py — shared can detector
+# Same settings as the detection scripts, as reusable functions.
+# Several interchangeable backends (see BACKENDS); "hough" is the original.
+# ---------------------------------------------
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+from undistort import distort_points, intrinsics_id, undistort_frame
+
+FRAME_SIZE = (960, 540)   # every script works in this resolution
+
+# Expected radius range for cans
+RADIUS_MIN = 39
+RADIUS_MAX = 44
+
+
+# Workspace the cans can stand in (robot mm); used for ROI mode
+WORKSPACE_POLYGON = [(-100, -450), (250, -450), (250, -250), (-100, -250)]
+
+HOUGH_PARAMS = dict(dp=1.2, minDist=60, param1=100, param2=30)
+BLUR_KSIZE = 7
+
+# HOUGH_GRADIENT_ALT: param2 is how perfect a circle must be (0..1)
+HOUGH_ALT_PARAMS = dict(dp=1.5, param1=100, param2=0.7)
+
+# Edge based backends (contour, chamfer)
+CANNY_LOW, CANNY_HIGH = 40, 100
+CIRCULARITY = 0.08        # max spread of contour radius / radius
+CHAMFER_MAX_DIST = 1.0    # px, mean edge distance along the ring that counts as a can
+CHAMFER_POINTS = 24       # samples on the ring
+CHAMFER_RADII = 3         # radii tried between RADIUS_MIN and RADIUS_MAX
+
+BACKENDS = {}
+
+
+def backend(name):
+    """Registers gray → N×3 (x, y, r) can detector. `scale` < 1: the image is downscaled by it."""
+    def register(fn):
+        BACKENDS[name] = fn
+        return fn
+    return register
+
+
+def _hough(blur, scale=1.0):
+    """HoughCircles with the can settings, scaled for a downsampled image. Returns N×3 float32."""
+    circles = cv2.HoughCircles(
+        blur,
+        cv2.HOUGH_GRADIENT,
+        dp=HOUGH_PARAMS["dp"],
+        minDist=HOUGH_PARAMS["minDist"] * scale,
+        param1=HOUGH_PARAMS["param1"],
+        param2=HOUGH_PARAMS["param2"] * scale,
+        minRadius=int(RADIUS_MIN * scale),
+        maxRadius=int(np.ceil(RADIUS_MAX * scale))
+    )
+    if circles is None:
+        return np.empty((0, 3), dtype=np.float32)
+    return circles[0]
+
+
+def _sorted(circles):
+    return circles[np.argsort(circles[:, 0])]
+
+
+# -----------------------------------------
+# Backends
+# -----------------------------------------
+@backend("hough")
+def hough_backend(gray, scale=1.0):
+    """Median blur + HOUGH_GRADIENT (the original detector)."""
+    blur = cv2.medianBlur(gray, max(3, int(BLUR_KSIZE * scale) | 1))
+    return _hough(blur, scale)
+
+
+@backend("hough_alt")
+def hough_alt_backend(gray, scale=1.0):
+    """HOUGH_GRADIENT_ALT: Scharr gradients, fewer false circles, usually faster."""
+    blur = cv2.GaussianBlur(gray, (0, 0), 2.0 * min(scale * 1.5, 1.0))
+    circles = cv2.HoughCircles(
+        blur,
+        cv2.HOUGH_GRADIENT_ALT,
+        dp=HOUGH_ALT_PARAMS["dp"],
+        minDist=HOUGH_PARAMS["minDist"] * scale,
+        param1=HOUGH_ALT_PARAMS["param1"],
+        param2=HOUGH_ALT_PARAMS["param2"],
+        minRadius=int(RADIUS_MIN * scale) - 1,
+        maxRadius=int(np.ceil(RADIUS_MAX * scale)) + 1
+    )
+    if circles is None:
+        return np.empty((0, 3), dtype=np.float32)
+    return circles[0]
+
+
+def _edges(gray):
+    return cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), CANNY_LOW, CANNY_HIGH)
+
+
+@backend("contour")
+def contour_backend(gray, scale=1.0):
+    """Outer edge contours whose enclosing circle has a can radius and which are round."""
+    edges = cv2.morphologyEx(_edges(gray), cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    r_min, r_max = RADIUS_MIN * scale - 3, RADIUS_MAX * scale + 3
+    circles = []
+    for cnt in contours:
+        if len(cnt) < 20:
+            continue
+        (x, y), r = cv2.minEnclosingCircle(cnt)
+        if not r_min <= r <= r_max:
+            continue
+        d = np.hypot(cnt[:, 0, 0] - x, cnt[:, 0, 1] - y)
+        if d.std() <= CIRCULARITY * r:
+            circles.append((x, y, d.mean()))
+    return np.array(circles, dtype=np.float32).reshape(-1, 3)
+
+
+@backend("chamfer")
+def chamfer_backend(gray, scale=1.0):
+    """
+    Distance-transform matching: for every pixel, the mean distance to the
+    nearest edge along a ring of can radius around it. Cans are minima.
+    """
+    clip = 4.0
+    dt = np.minimum(cv2.distanceTransform(255 - _edges(gray), cv2.DIST_L2, 3), clip)
+    h, w = dt.shape
+
+    radii = np.linspace(RADIUS_MIN, RADIUS_MAX, CHAMFER_RADII) * scale
+    pad = int(np.ceil(radii[-1])) + 1
+    padded = cv2.copyMakeBorder(dt, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=clip)
+    angles = np.linspace(0, 2 * np.pi, CHAMFER_POINTS, endpoint=False)
+
+    best = np.full((h, w), np.inf, dtype=np.float32)
+    best_r = np.zeros((h, w), dtype=np.float32)
+    acc = np.empty((h, w), dtype=np.float32)
+    for r in radii:
+        acc.fill(0)
+        offsets = np.round(np.column_stack([np.cos(angles), np.sin(angles)]) * r).astype(int)
+        for dx, dy in offsets:
+            acc += padded[pad + dy:pad + dy + h, pad + dx:pad + dx + w]
+        acc /= CHAMFER_POINTS
+        better = acc < best
+        best[better] = acc[better]
+        best_r[better] = r
+
+    # strongest minima first, at least minDist apart
+    ys, xs = np.nonzero(best < CHAMFER_MAX_DIST)
+    order = np.argsort(best[ys, xs])
+    min_dist2 = (HOUGH_PARAMS["minDist"] * scale) ** 2
+    circles = []
+    for x, y in zip(xs[order], ys[order]):
+        if any((x - cx) ** 2 + (y - cy) ** 2 <= min_dist2 for cx, cy, _ in circles):
+            continue
+        circles.append((x + _vertex(best[y, x - 1:x + 2]), y + _vertex(best[y - 1:y + 2, x]), best_r[y, x]))
+    return np.array(circles, dtype=np.float32).reshape(-1, 3)
+
+
+def _vertex(v):
+    """Sub-pixel offset of the minimum of three samples (parabola fit)."""
+    if len(v) < 3:
+        return 0.0
+    d = v[0] - 2 * v[1] + v[2]
+    return float(0.5 * (v[0] - v[2]) / d) if d > 0 else 0.0
+
+
+def detect_cans(frame, backend="hough"):
+    """Resizes one BGR frame and returns an N×3 float32 array of (x, y, r), sorted left → right."""
+    frame = cv2.resize(frame, FRAME_SIZE)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return _sorted(BACKENDS[backend](gray))
+
+
+class CanDetector:
+    """
+    Can detector with optional speed-ups:
+      roi:          only look inside WORKSPACE_POLYGON, projected into the image
+                    through the inverse homography (needs calibration.json)
+      coarse_scale: run the backend on a downscaled crop (e.g. 0.5), then refine
+                    every circle with Hough in a small full-resolution patch
+      backend:      name in BACKENDS ("hough", "hough_alt", "contour", "chamfer")
+      undistort:    detect on the lens-corrected frame (cv2.remap, see undistort.py);
+                    centres are mapped back to raw pixels, like every other path
+    Coordinates are always returned in FRAME_SIZE pixels. Per-stage times of
+    the last frame are in .timings (ms), running totals in .totals.
+    """
+
+    def __init__(self, roi=False, coarse_scale=None, polygon=WORKSPACE_POLYGON, backend="hough", undistort=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, choose from {sorted(BACKENDS)}")
+        self.backend = backend
+        self.coarse_scale = coarse_scale
+        self.timings = {}
+        self.totals = {}
+        self.frames = 0
+
+        self.undistort = undistort and intrinsics_id() is not None
+        self.box = None
+        self.mask = None
+        if roi:
+            self.box, self.mask = workspace_roi(polygon, distorted=not self.undistort)
+
+    # -----------------------------------------
+    # Pipeline
+    # -----------------------------------------
+    def detect(self, frame):
+        t = {}
+        t0 = time.perf_counter()
+
+        if self.undistort:
+            if frame.shape[1::-1] != FRAME_SIZE:
+                frame = cv2.resize(frame, FRAME_SIZE)
+            frame = undistort_frame(frame)
+            t["undistort"] = time.perf_counter() - t0
+            t0 = time.perf_counter()
+
+        # Crop first, then resize only the crop to FRAME_SIZE scale
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            sx = frame.shape[1] / FRAME_SIZE[0]
+            sy = frame.shape[0] / FRAME_SIZE[1]
+            frame = frame[int(y0 * sy):int(np.ceil(y1 * sy)), int(x0 * sx):int(np.ceil(x1 * sx))]
+            size = (x1 - x0, y1 - y0)
+        else:
+            x0, y0 = 0, 0
+            size = FRAME_SIZE
+        if frame.shape[1::-1] != size:
+            frame = cv2.resize(frame, size)
+        t1 = time.perf_counter()
+        t["resize"] = t1 - t0
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        t2 = time.perf_counter()
+        t["gray"] = t2 - t1
+
+        if self.coarse_scale:
+            circles = self._coarse_to_fine(gray, t)
+        else:
+            circles = BACKENDS[self.backend](gray)
+            t[self.backend] = time.perf_counter() - t2
+
+        circles[:, 0] += x0
+        circles[:, 1] += y0
+
+        # Drop hits outside the workspace polygon
+        if self.mask is not None and len(circles):
+            xi = np.clip(circles[:, 0].astype(int), 0, FRAME_SIZE[0] - 1)
+            yi = np.clip(circles[:, 1].astype(int), 0, FRAME_SIZE[1] - 1)
+            circles = circles[self.mask[yi, xi] > 0]
+
+        if self.undistort and len(circles):
+            circles[:, :2] = distort_points(circles[:, :2])
+
+        self._record(t)
+        return _sorted(circles)
+
+    def _coarse_to_fine(self, gray, t):
+        s = self.coarse_scale
+        t0 = time.perf_counter()
+
+        small = cv2.resize(gray, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+        t1 = time.perf_counter()
+        t["downscale"] = t1 - t0
+
+        # pixel centres: (x + 0.5) / s - 0.5 maps back to full resolution
+        coarse = BACKENDS[self.backend](small, s)
+        coarse[:, :2] = (coarse[:, :2] + 0.5) / s - 0.5
+        coarse[:, 2] /= s
+        t2 = time.perf_counter()
+        t[self.backend] = t2 - t1
+
+        # Refine each circle at full resolution in a patch around it
+        h, w = gray.shape
+        half = RADIUS_MAX + int(np.ceil(2 / s)) + 4
+        refined = []
+        for x, y, _ in coarse:
+            px0, py0 = max(int(x) - half, 0), max(int(y) - half, 0)
+            patch = gray[py0:int(y) + half, px0:int(x) + half]
+            fine = _hough(cv2.medianBlur(patch, BLUR_KSIZE)) if min(patch.shape) > 2 * RADIUS_MIN else []
+
+            # the coarse pass runs with a lower accumulator threshold: a hit the
+            # full-resolution Hough does not confirm is dropped
+            if len(fine):
+                k = int(np.argmin(np.hypot(fine[:, 0] + px0 - x, fine[:, 1] + py0 - y)))
+                refined.append((fine[k, 0] + px0, fine[k, 1] + py0, fine[k, 2]))
+        t["refine"] = time.perf_counter() - t2
+
+        return np.array(refined, dtype=np.float32).reshape(-1, 3)
+
+    # -----------------------------------------
+    # Timing report
+    # -----------------------------------------
+    def _record(self, t):
+        self.frames += 1
+        self.timings = {k: v * 1e3 for k, v in t.items()}
+        for k, v in self.timings.items():
+            self.totals[k] = self.totals.get(k, 0.0) + v
+            metrics.observe(f"can.{k}", t[k])
+
+    def timing_report(self):
+        if self.frames == 0:
+            return "no frames"
+        mean = {k: v / self.frames for k, v in self.totals.items()}
+        total = sum(mean.values())
+        stages = ", ".join(f"{k} {v:.2f}" for k, v in mean.items())
+        return f"{stages} | total {total:.2f} ms/frame (~{1e3 / total:.0f} FPS)"
+
+
+def workspace_roi(polygon=WORKSPACE_POLYGON, margin=RADIUS_MAX, distorted=True):
+    """
+    Projects a robot-space polygon into the image (raw, or lens-corrected if distorted=False).
+    Returns ((x0, y0, x1, y1) crop box with `margin` px around it, full-frame polygon mask).
+    """
+    from coord_transform import robot_to_camera_batch
+
+    px = robot_to_camera_batch(polygon, distorted=distorted)
+    w, h = FRAME_SIZE
+
+    x0 = int(np.clip(np.floor(px[:, 0].min()) - margin, 0, w))
+    y0 = int(np.clip(np.floor(px[:, 1].min()) - margin, 0, h))
+    x1 = int(np.clip(np.ceil(px[:, 0].max()) + margin, 0, w))
+    y1 = int(np.clip(np.ceil(px[:, 1].max()) + margin, 0, h))
+
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.fillPoly(mask, [np.round(px).astype(np.int32)], 255)
+    return (x0, y0, x1, y1), mask
+
+
+def measure_can(source, n_frames=60, expected=None, gate=40.0, min_hits=0.5):
+    """
+    Watches `n_frames` new frames of a FrameSource for a single can and
+    returns its median (u, v) in px.
+
+    expected: predicted pixel position; the detection closest to it (within
+    `gate` px) is used, so other cans on the table don't disturb the result.
+    Without it, only frames with exactly one detection count.
+    Returns None if the can was seen in fewer than `min_hits` of the frames.
+    """
+    samples = []
+    seq = source.seq   # only frames captured from now on
+
+    for _ in range(n_frames):
+        item = source.read(after=seq)
+        if item is None:
+            continue
+        seq, _, frame = item
+
+        circles = detect_cans(frame)
+        if len(circles) == 0:
+            continue
+
+        if expected is not None:
+            d = np.hypot(circles[:, 0] - expected[0], circles[:, 1] - expected[1])
+            k = int(np.argmin(d))
+            if d[k] <= gate:
+                samples.append(circles[k, :2])
+        elif len(circles) == 1:
+            samples.append(circles[0, :2])
+
+    if len(samples) < min_hits * n_frames:
+        return None
+
+    # median is robust against the odd mis-detection
+    return tuple(float(c) for c in np.median(np.array(samples), axis=0))
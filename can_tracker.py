@@ -0,0 +1,150 @@
+# ---------------------------------------------
+# can_tracker.py — keep a stable ID per can across frames
+# Detections are matched to existing tracks by distance (Hungarian when
+# SciPy is installed, greedy nearest-neighbour otherwise), with gating.
+# A track whose recent detections drift away from its mean (the can was
+# nudged) restarts its statistics from those recent detections.
+# ---------------------------------------------
+import math
+from collections import deque
+
+import numpy as np
+
+from running_stats import RunningStats
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+class Track:
+    def __init__(self, track_id, x, y, window=10, jump=3.0):
+        self.id = track_id
+        self.age = 0        # frames since the track was born
+        self.hits = 0       # frames with a matching detection
+        self.misses = 0     # consecutive frames without one
+
+        # running statistics of the matched positions
+        self.stats = RunningStats()
+        self.last = (x, y)
+        self.recent = deque(maxlen=window)   # the last few matched positions
+        self.jump = jump                     # px, recent ↔ mean distance that means "moved"
+        self.add(x, y)
+
+    def add(self, x, y):
+        self.hits += 1
+        self.misses = 0
+        self.stats.add(x, y)
+        self.last = (x, y)
+        self.recent.append((x, y))
+        if self.moved():
+            self.restart()
+
+    def seen(self):
+        """Matched a reused detection: still there, but no new sample."""
+        self.hits += 1
+        self.misses = 0
+
+    def position(self):
+        """Where the can stands now: median of the recent detections."""
+        x, y = np.median(np.array(self.recent), axis=0)
+        return float(x), float(y)
+
+    def moved(self):
+        if self.jump is None or len(self.recent) < self.recent.maxlen or self.n <= len(self.recent):
+            return False
+        return math.dist(self.position(), self.mean) > self.jump
+
+    def restart(self):
+        """The can was moved: forget the samples from where it used to stand."""
+        self.recent = deque((p for p in self.recent if math.dist(p, self.last) <= self.jump),
+                            maxlen=self.recent.maxlen)
+        self.stats = RunningStats()
+        for x, y in self.recent:
+            self.stats.add(x, y)
+
+    @property
+    def n(self):
+        return self.stats.n
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+
+class CanTracker:
+    """
+    tracker = CanTracker()
+    for frame ...:
+        tracker.update(circles[:, :2])
+    tracker.confirmed()  → tracks seen often enough to be real cans
+    """
+
+    def __init__(self, gate=25.0, max_misses=15, min_hits=10, window=10, jump=3.0):
+        self.gate = gate                # px, max distance detection ↔ track
+        self.max_misses = max_misses    # drop a track after this many missed frames
+        self.min_hits = min_hits        # hits before a track counts as a can
+        self.window = window            # detections behind Track.position()
+        self.jump = jump                # px, restart a track's stats when it moves this far; None = off
+        self.tracks = []
+        self.next_id = 0
+
+    def update(self, detections, sample=True):
+        """
+        detections: N×2 array of (x, y) px. Returns the live tracks.
+        sample=False: the detections are reused from an earlier frame (see
+        change_gate); they keep tracks alive or count misses, but add no samples.
+        """
+        dets = np.asarray(detections, dtype=np.float64).reshape(-1, 2)
+
+        for t in self.tracks:
+            t.age += 1
+
+        matched_t, matched_d = self._associate(dets)
+
+        for ti, di in zip(matched_t, matched_d):
+            if sample:
+                self.tracks[ti].add(*dets[di])
+            else:
+                self.tracks[ti].seen()
+
+        for ti in set(range(len(self.tracks))) - set(matched_t):
+            self.tracks[ti].misses += 1
+
+        for di in set(range(len(dets))) - set(matched_d):
+            self.tracks.append(Track(self.next_id, *dets[di], self.window, self.jump))
+            self.next_id += 1
+
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        return self.tracks
+
+    def _associate(self, dets):
+        if not self.tracks or len(dets) == 0:
+            return [], []
+
+        # Cans stand still, so the running mean is the best prediction
+        pred = np.array([t.mean for t in self.tracks])
+        cost = np.hypot(pred[:, None, 0] - dets[None, :, 0], pred[:, None, 1] - dets[None, :, 1])
+
+        if linear_sum_assignment is not None:
+            rows, cols = linear_sum_assignment(cost)
+        else:
+            # greedy: closest pairs first
+            order = np.dstack(np.unravel_index(np.argsort(cost, axis=None), cost.shape))[0]
+            used_r, used_c, rows, cols = set(), set(), [], []
+            for r, c in order:
+                if r in used_r or c in used_c:
+                    continue
+                used_r.add(r)
+                used_c.add(c)
+                rows.append(r)
+                cols.append(c)
+
+        keep = [(r, c) for r, c in zip(rows, cols) if cost[r, c] <= self.gate]
+        return [int(r) for r, _ in keep], [int(c) for _, c in keep]
+
+    def confirmed(self):
+        """Tracks that are real cans, sorted left → right."""
+        tracks = [t for t in self.tracks if t.hits >= self.min_hits]
+        return sorted(tracks, key=lambda t: t.mean[0])
@@ -0,0 +1,127 @@
+# ---------------------------------------------
+# change_gate.py — skip detection work while the table is not changing
+# Every frame is shrunk to a thumbnail and compared with the thumbnail of
+# the last processed frame:
+#   STATIC   nothing moved  → reuse the previous detections
+#   PARTIAL  a few regions  → re-detect only there, keep the rest
+#   FULL     a lot changed (or REFRESH_FRAMES without a full pass)
+# ---------------------------------------------
+import cv2
+import numpy as np
+
+from can_detection import RADIUS_MAX
+
+STATIC, PARTIAL, FULL = "static", "partial", "full"
+
+GATE_SCALE = 0.125        # thumbnail size relative to the frame
+DIFF_THRESHOLD = 18       # gray levels a thumbnail pixel must change by
+MIN_CHANGED = 2           # changed thumbnail pixels that count as motion
+REGION_MARGIN = 2 * RADIUS_MAX   # px around a change, so whole cans fit in the crop
+                                 # (other detectors: pass their own, e.g. object_detection.REGION_MARGIN)
+MAX_PARTIAL = 0.4         # share of the frame above which a full pass is cheaper
+REFRESH_FRAMES = 300      # force a full pass at least this often (lighting drift)
+
+
+class ChangeGate:
+    """
+    gate = ChangeGate()
+    mode, regions = gate.check(frame)     # regions: [(x0, y0, x1, y1), ...] for PARTIAL
+    """
+
+    def __init__(self, scale=GATE_SCALE, threshold=DIFF_THRESHOLD, min_changed=MIN_CHANGED,
+                 margin=REGION_MARGIN, max_partial=MAX_PARTIAL, refresh=REFRESH_FRAMES):
+        self.scale = scale
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.margin = margin
+        self.max_partial = max_partial
+        self.refresh = refresh
+
+        self.reference = None    # thumbnail of the last processed frame
+        self.since_full = 0
+
+        # counters
+        self.frames = 0
+        self.skipped = 0         # no detection at all, previous result reused
+        self.partial = 0         # only changed regions re-detected
+        self.full = 0
+
+    def reset(self):
+        """Forget the reference: the next frame gets a full pass."""
+        self.reference = None
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def check(self, frame):
+        """Classifies the frame and updates the reference for the work the caller is about to do."""
+        self.frames += 1
+        thumb = self._thumbnail(frame)
+
+        if self.reference is None or self.since_full >= self.refresh:
+            return self._full(thumb)
+
+        changed = cv2.absdiff(thumb, self.reference) > self.threshold
+        if np.count_nonzero(changed) < self.min_changed:
+            self.skipped += 1
+            self.since_full += 1
+            return STATIC, []
+
+        regions = self._regions(changed.astype(np.uint8), frame.shape)
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)
+        if area > self.max_partial * frame.shape[0] * frame.shape[1]:
+            return self._full(thumb)
+
+        # only the re-detected parts become the new reference: slow drift
+        # elsewhere keeps adding up until it is noticed
+        s = self.scale
+        for x0, y0, x1, y1 in regions:
+            ty0, ty1, tx0, tx1 = int(y0 * s), int(np.ceil(y1 * s)), int(x0 * s), int(np.ceil(x1 * s))
+            self.reference[ty0:ty1, tx0:tx1] = thumb[ty0:ty1, tx0:tx1]
+        self.partial += 1
+        self.since_full += 1
+        return PARTIAL, regions
+
+    def _full(self, thumb):
+        self.reference = thumb
+        self.full += 1
+        self.since_full = 0
+        return FULL, []
+
+    def _regions(self, changed, shape):
+        """Boxes around the changed blobs, in frame pixels, grown by `margin` and merged if they overlap."""
+        n, _, stats, _ = cv2.connectedComponentsWithStats(changed, connectivity=8)
+        h, w = shape[:2]
+        s, m = self.scale, self.margin
+
+        boxes = []
+        for x, y, bw, bh, _ in stats[1:n]:
+            boxes.append([max(int(x / s) - m, 0), max(int(y / s) - m, 0),
+                          min(int((x + bw) / s) + m, w), min(int((y + bh) / s) + m, h)])
+
+        # merge overlapping boxes until none overlap
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    a, b = boxes[i], boxes[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                        del boxes[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return [tuple(b) for b in boxes]
+
+    def report(self):
+        if self.frames == 0:
+            return "no frames"
+        return (f"{self.frames} frames: {self.skipped} skipped ({self.skipped / self.frames:.0%}), "
+                f"{self.partial} partial, {self.full} full — detections reused in "
+                f"{(self.skipped + self.partial) / self.frames:.0%} of frames")
+
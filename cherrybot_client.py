@@ -0,0 +1,142 @@
+# ---------------------------------------------
+# cherrybot_client.py — pooled HTTP client for the cherrybot API
+# One persistent requests.Session (keep-alive, connection pool, retries)
+# instead of a fresh connection + sleep per call.
+# ---------------------------------------------
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+DEFAULT_BASE_URL = os.environ.get(
+    "CHERRYBOT_URL", "https://api.interactions.ics.unisg.ch/cherrybot"
+)
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Retry idempotent calls on connection errors and gateway hiccups
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.3
+RETRY_STATUS = (502, 503, 504)
+
+
+class CherrybotClient:
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, pool_size=4):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = None
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset({"GET", "PUT", "DELETE"}),  # never replay POST
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # -----------------------------------------
+    # Low level
+    # -----------------------------------------
+    def request(self, method, path, timeout=None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if self.token:
+            headers.setdefault("Authentication", self.token)
+
+        t0 = time.perf_counter()
+        response = self.session.request(
+            method,
+            f"{self.base_url}{path}",
+            headers=headers,
+            timeout=timeout or self.timeout,
+            **kwargs
+        )
+        if metrics.enabled():
+            # one histogram per endpoint, not per operator token
+            endpoint = "/operator/:token" if path.startswith("/operator/") else path
+            metrics.observe(f"http.{method} {endpoint}", time.perf_counter() - t0)
+        return response
+
+    def close(self):
+        self.session.close()
+
+    # -----------------------------------------
+    # Operator
+    # -----------------------------------------
+    def get_operator(self, timeout=None):
+        response = self.request("GET", "/operator", timeout=timeout)
+        if response.status_code == 200:
+            return response.json()["token"], 200
+        return None, response.status_code
+
+    def post_operator(self, name, email, timeout=None):
+        response = self.request("POST", "/operator", timeout=timeout,
+                                json={"name": name, "email": email})
+        if response.status_code == 200:
+            self.token = response.headers["Location"].split("/")[-1]
+            return self.token, 200
+        return 0, response.status_code
+
+    def delete_operator(self, token_delete, timeout=None):
+        response = self.request("DELETE", f"/operator/{token_delete}", timeout=timeout)
+        if token_delete == self.token:
+            self.token = None
+        return response.status_code
+
+    # -----------------------------------------
+    # TCP
+    # -----------------------------------------
+    def get_tcp(self, timeout=None):
+        response = self.request("GET", "/tcp", timeout=timeout)
+        if response.status_code == 200:
+            d = response.json()
+            return (
+                d["coordinate"]["x"],
+                d["coordinate"]["y"],
+                d["coordinate"]["z"],
+                d["rotation"]["roll"],
+                d["rotation"]["pitch"],
+                d["rotation"]["yaw"],
+            )
+        return None
+
+    def put_tcp_target(self, x, y, z, roll, pitch, yaw, speed=200, timeout=None):
+        data = {
+            "target": {
+                "coordinate": {"x": x, "y": y, "z": z},
+                "rotation": {"roll": roll, "pitch": pitch, "yaw": yaw},
+            },
+            "speed": speed
+        }
+        response = self.request("PUT", "/tcp/target", timeout=timeout, json=data)
+        return response.status_code
+
+    # -----------------------------------------
+    # Gripper / init
+    # -----------------------------------------
+    def put_gripper(self, param, timeout=None):
+        response = self.request("PUT", "/gripper", timeout=timeout, json=param)
+        return response.status_code
+
+    def get_gripper(self, timeout=None):
+        response = self.request("GET", "/gripper", timeout=timeout)
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    def initialize(self, timeout=None):
+        response = self.request("PUT", "/initialize", timeout=timeout)
+        return response.status_code
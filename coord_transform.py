@@ -1,9 +1,16 @@
 # ---------------------------------------------
 # coord_transform.py — CAMERA → ROBOT transform
-# Using 4-point HOMOGRAPHY (perspective correct)
+# Using HOMOGRAPHY (perspective correct), cached in calibration.json
 # ---------------------------------------------
+import hashlib
+import json
+import os
+
 import numpy as np
-import cv2
+
+from atomic_file import atomic_write
+import metrics
+from undistort import distort_points, intrinsics_id, undistort_points
 
 # ---------------------------------------------
 # Calibration points
@@ -27,22 +34,175 @@ CAN_D_C = (275.4000, 391.8000)
 # ---------------------------------------------
 # Build 3×3 homography H  such that:
 #   [x, y, 1]^T  =  H  ·  [u, v, 1]^T
+#
+# H is stored in calibration.json together with its inverse, the points
+# it was fit from and the reprojection error. It is loaded on first use;
+# cv2 is only imported when the file is missing or stale.
+#
+# With lens intrinsics (see undistort.py) H works on undistorted pixels:
+# callers still pass raw pixel coords, they are corrected on the way in
+# (and distorted again by robot_to_camera_batch).
 # ---------------------------------------------
-src_pts = np.array([CAN_A_C, CAN_B_C, CAN_C_C, CAN_D_C], dtype=np.float32)
-dst_pts = np.array([CAN_A_R, CAN_B_R, CAN_C_R, CAN_D_R], dtype=np.float32)
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration.json")
+CALIBRATION_VERSION = 1
+
+src_pts = np.array([CAN_A_C, CAN_B_C, CAN_C_C, CAN_D_C], dtype=np.float64)
+dst_pts = np.array([CAN_A_R, CAN_B_R, CAN_C_R, CAN_D_R], dtype=np.float64)
+
+_calibration = None
+
+
+def points_hash(src, dst):
+    """Fingerprint of a point set, used to notice edited calibration points."""
+    data = json.dumps([np.round(src, 4).tolist(), np.round(dst, 4).tolist()])
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def reprojection_error(H, src, dst):
+    """RMS distance (mm) between H·src and dst (src in raw pixels)."""
+    mapped = _apply_homography(H, undistort_points(src))
+    return float(np.sqrt(np.mean(np.sum((mapped - dst) ** 2, axis=1))))
+
+
+def save_calibration(H, src, dst, method="manual", path=CALIBRATION_FILE):
+    H = np.asarray(H, dtype=np.float64)
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+
+    calib = {
+        "version": CALIBRATION_VERSION,
+        "method": method,
+        "config_hash": points_hash(src_pts, dst_pts),
+        "intrinsics": intrinsics_id(),
+        "H": H.tolist(),
+        "H_inv": np.linalg.inv(H).tolist(),
+        "src_pts": src.tolist(),
+        "dst_pts": dst.tolist(),
+        "reprojection_error_mm": reprojection_error(H, src, dst),
+    }
+
+    with atomic_write(path) as f:
+        json.dump(calib, f, indent=2)
+
+    _use(calib)
+    return calib
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    """Returns the stored calibration, refitting from the points above if it is missing or stale."""
+    calib = None
+    try:
+        with open(path) as f:
+            calib = json.load(f)
+        if (calib.get("version") == CALIBRATION_VERSION
+                and calib.get("config_hash") == points_hash(src_pts, dst_pts)
+                and calib.get("intrinsics") == intrinsics_id()):
+            return _use(calib)
+    except (FileNotFoundError, ValueError, KeyError):
+        calib = None
+
+    # Only the lens correction changed: refit from the stored (raw) points
+    if (calib is not None and calib.get("config_hash") == points_hash(src_pts, dst_pts)
+            and calib.get("version") == CALIBRATION_VERSION):
+        H, _ = fit_homography(calib["src_pts"], calib["dst_pts"])
+        print(f"📐 Calibration refit for the new lens correction → {os.path.basename(path)}")
+        return save_calibration(H, calib["src_pts"], calib["dst_pts"], method=calib["method"], path=path)
+
+    H, _ = fit_homography(src_pts, dst_pts)
+    print(f"📐 Calibration refit from {len(src_pts)} points → {os.path.basename(path)}")
+    return save_calibration(H, src_pts, dst_pts, method="manual", path=path)
+
 
-H, _ = cv2.findHomography(src_pts, dst_pts)
+def fit_homography(src, dst, ransac_threshold=3.0):
+    """
+    Fits H (pixels → mm). With more than four points RANSAC drops outliers;
+    `ransac_threshold` is the reprojection limit in mm. `src` are raw pixels,
+    undistorted first when lens intrinsics exist.
+    Returns (H, inlier_mask).
+    """
+    import cv2   # only needed to fit
+
+    src = undistort_points(src)
+    dst = np.asarray(dst, dtype=np.float64)
+
+    if len(src) > 4:
+        H, mask = cv2.findHomography(src, dst, cv2.RANSAC, ransac_threshold)
+    else:
+        H, mask = cv2.findHomography(src, dst)
+
+    if H is None:
+        raise ValueError(f"Could not fit a homography to {len(src)} points.")
+    return H, mask.ravel().astype(bool)
+
+
+def _use(calib):
+    global _calibration
+    calib["H"] = np.asarray(calib["H"], dtype=np.float64)
+    calib["H_inv"] = np.asarray(calib["H_inv"], dtype=np.float64)
+    _calibration = calib
+    return calib
+
+
+def get_calibration():
+    if _calibration is None:
+        load_calibration()
+    return _calibration
 
 
 # ---------------------------------------------
 # Convert CAMERA → ROBOT coordinates (u, v)
 # ---------------------------------------------
 def camera_to_robot(u, v):
-    pt = np.array([[u, v, 1]], dtype=np.float32).T
-    mapped = H @ pt
+    (u, v), = undistort_points([(u, v)])
+    pt = np.array([u, v, 1.0])
+    mapped = get_calibration()["H"] @ pt
 
     # divide by w to convert from homogeneous
     x = mapped[0] / mapped[2]
     y = mapped[1] / mapped[2]
 
     return float(x), float(y)
+
+
+# ---------------------------------------------
+# Batch versions: N×2 in, N×2 out (float64)
+# ---------------------------------------------
+def _apply_homography(M, points, out=None):
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if out is None:
+        out = np.empty_like(pts)
+
+    # [x, y, w] = M · [u, v, 1], without building the homogeneous N×3 array
+    w = pts @ M[2, :2]
+    w += M[2, 2]
+    np.dot(pts, M[:2, :2].T, out=out)
+    out += M[:2, 2]
+    out /= w[:, None]
+    return out
+
+
+@metrics.timed("transform")
+def camera_to_robot_batch(points, out=None, undistorted=False):
+    """
+    Maps an N×2 array of pixel coords (u, v) to robot coords (x, y) in mm.
+    undistorted=True: the points are already lens-corrected (e.g. from an undistorted frame).
+    """
+    H = get_calibration()["H"]
+    return _apply_homography(H, points if undistorted else undistort_points(points), out)
+
+
+def robot_to_camera_batch(points, out=None, distorted=True):
+    """Maps an N×2 array of robot coords (x, y) in mm back to pixel coords (u, v), raw unless distorted=False."""
+    px = _apply_homography(get_calibration()["H_inv"], points, out)
+    if distorted and intrinsics_id() is not None:
+        px[:] = distort_points(px)
+    return px
+
+
+def jacobian(u, v, eps=0.5):
+    """Local 2×2 d(x, y)/d(u, v) of the camera → robot map at (u, v), in mm per px."""
+    pts = np.array([[u + eps, v], [u - eps, v], [u, v + eps], [u, v - eps]])
+    m = camera_to_robot_batch(pts)
+    d_du = (m[0] - m[1]) / (2 * eps)
+    d_dv = (m[2] - m[3]) / (2 * eps)
+    return np.column_stack([d_du, d_dv])
@@ -1,111 +1,188 @@
 import cv2
-import numpy as np
-from collections import defaultdict, deque
+from can_detection import RADIUS_MAX, RADIUS_MIN, CanDetector
+from can_tracker import CanTracker
+from change_gate import STATIC, ChangeGate
+from coord_transform import jacobian
+from detection_channel import publish
+from frame_source import FrameSource
+from preview import Preview, StatusLog
 
-OUTPUT_FILE = "detected_coords.txt"
 CAMERA_SOURCE = 0
 
-# Expected radius range for cans
-RADIUS_MIN = 39
-RADIUS_MAX = 44
+# Detector speed-ups (radius range etc. live in can_detection.py)
+USE_ROI = False       # True: only search the calibrated workspace
+COARSE_SCALE = None   # e.g. 0.5: Hough on a half-size image, refined at full size; None = off
+BACKEND = "hough"     # or "hough_alt" / "contour" / "chamfer", compare with bench_vision.py --compare
+UNDISTORT_FRAMES = False   # detect on lens-corrected frames (remap); centres are corrected either way
 
-# Number of frames to average per can
+# Stop as soon as every can's position is known this well (standard error of the mean)
+STOP_SE_PX = 0.1      # px, None = off
+STOP_SE_MM = 0.1      # mm, via the calibration, None = off
+MIN_SAMPLES = 20      # never stop before this many samples per can
+
+# Hard upper limit of frames to average per can
 BUFFER_SIZE = 200
 
-# Dictionary of buffers: { index: deque }
-buffers = defaultdict(lambda: deque(maxlen=BUFFER_SIZE))
+# Write the robust median instead of the mean (outlier-proof)
+USE_MEDIAN = False
 
-cap = cv2.VideoCapture(CAMERA_SOURCE)
-if not cap.isOpened():
-    print("❌ Could not open camera.")
-    exit()
+# Keep running and republish the current cans (for robot.py "service" mode)
+CONTINUOUS = False
+PUBLISH_INTERVAL = 0.5   # s
+USE_GATE = True          # continuous mode: no detection while nothing moves and all cans are converged
+REOBSERVE_FRAMES = 30    # gate on: run a real detection at least this often
 
-print("🎯 Multi-can detection active — each can needs 200 detections.")
+# One track per can, matched across frames (survives missed / false detections);
+# a can nudged by more than `jump` px restarts its averaging
+tracker = CanTracker(gate=25.0, max_misses=15, min_hits=10, window=10, jump=3.0)
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        continue
 
-    frame = cv2.resize(frame, (960, 540))
-    annotated = frame.copy()
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    blur = cv2.medianBlur(gray, 7)
-
-    circles = cv2.HoughCircles(
-        blur,
-        cv2.HOUGH_GRADIENT,
-        dp=1.2,
-        minDist=60,
-        param1=100,
-        param2=30,
-        minRadius=RADIUS_MIN,
-        maxRadius=RADIUS_MAX
-    )
+def result(track):
+    """
+    (x, y, confidence) to publish; confidence = share of frames the can was seen in.
+    Continuous mode publishes where the can stands now (median of the last few
+    detections), not the average over the track's whole life, so the robot's
+    re-check before descending sees a can that was moved.
+    """
+    if CONTINUOUS:
+        x, y = track.position()
+    else:
+        x, y = track.stats.median() if USE_MEDIAN else track.mean
+    return x, y, track.hits / (track.age + 1)
 
-    if circles is not None:
-        circles = np.uint16(np.around(circles))[0]
 
-        # Sort left → right so cans always get consistent indices
-        circles = sorted(circles, key=lambda c: c[0])
+def is_done(track):
+    if track.n >= BUFFER_SIZE:
+        return True
+    J = jacobian(*track.mean) if STOP_SE_MM is not None else None
+    return track.stats.converged(STOP_SE_PX, STOP_SE_MM, J, MIN_SAMPLES)
 
-        for idx, (x, y, r) in enumerate(circles):
 
-            # --- Draw circle ---
-            cv2.circle(annotated, (x, y), r, (0, 255, 0), 2)
-            cv2.circle(annotated, (x, y), 3, (0, 0, 255), -1)
-
-            # --- Label CAN ID ---
-            label = f"CAN {idx}"
-            cv2.putText(
-                annotated,
-                label,
-                (x - 40, y - r - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.8,
-                (0, 255, 0),
-                2
-            )
-
-            # Add coordinates to buffer
-            buffers[idx].append((x, y))
-
-            print(f"Can {idx}: {len(buffers[idx])}/200 samples   Latest=({x}, {y})")
+def draw(frame, cans):
+    """Debug overlay: one labelled circle per confirmed can."""
+    annotated = frame.copy()
+    for t in cans:
+        x, y = t.last
+        x, y, r = int(x), int(y), (RADIUS_MIN + RADIUS_MAX) // 2
+
+        # --- Draw circle ---
+        cv2.circle(annotated, (x, y), r, (0, 255, 0), 2)
+        cv2.circle(annotated, (x, y), 3, (0, 0, 255), -1)
+
+        # --- Label CAN ID ---
+        label = f"CAN {t.id}"
+        cv2.putText(
+            annotated,
+            label,
+            (x - 40, y - r - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            (0, 255, 0),
+            2
+        )
 
     # Draw count of detected cans
     cv2.putText(
         annotated,
-        f"Cans detected: {len(buffers)}",
+        f"Cans detected: {len(cans)}",
         (20, 40),
         cv2.FONT_HERSHEY_SIMPLEX,
         1.0,
         (0, 255, 255),
         2
     )
+    return annotated
 
-    cv2.imshow("Multi-can Detector", annotated)
 
-    # Check if ALL cans reached 200 samples
-    if len(buffers) > 0 and all(len(buffers[i]) == BUFFER_SIZE for i in buffers.keys()):
-        print("\n🎉 All cans reached 200 samples! Writing to file...")
+def summary(cans, fps):
+    lines = [f"📊 {fps:.1f} FPS, {len(cans)} cans"]
+    if gate is not None:
+        lines.append(f"   gate: {gate.report()}")
+    for t in cans:
+        se_x, se_y = t.stats.standard_error
+        lines.append(f"   Can {t.id}: {t.n} samples   SE=({se_x:.3f}, {se_y:.3f}) px   "
+                     f"Latest=({t.last[0]:.1f}, {t.last[1]:.1f})   misses={t.misses}")
+    return "\n".join(lines)
 
-        with open(OUTPUT_FILE, "w") as f:
-            for i in sorted(buffers.keys()):
-                xs = [p[0] for p in buffers[i]]
-                ys = [p[1] for p in buffers[i]]
-                avg_x = np.mean(xs)
-                avg_y = np.mean(ys)
-                f.write(f"{avg_x:.1f} {avg_y:.1f}\n")
 
-                print(f"📝 CAN {i} averaged pixel coords: {avg_x:.1f}, {avg_y:.1f}")
+detector = CanDetector(roi=USE_ROI, coarse_scale=COARSE_SCALE, backend=BACKEND,
+                       undistort=UNDISTORT_FRAMES)
 
-        print("🛑 Detection completed — exiting.\n")
-        break
+source = FrameSource(CAMERA_SOURCE).start()
+if not source.opened:
+    print("❌ Could not open camera.")
+    exit()
+
+last_publish = 0.0
+print(f"🎯 Multi-can detection active — each can needs up to {BUFFER_SIZE} detections.")
+
+preview = Preview("Multi-can Detector")
+status = StatusLog()
+gate = ChangeGate() if USE_GATE and CONTINUOUS else None
+cans = []
+circles = None
+since_detect = 0   # frames since the last real detection
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+for _, ts, frame in source.frames():
+    frame = cv2.resize(frame, (960, 540))
+
+    # Static table and every can known: nothing new to learn from this frame.
+    # (Repeating old detections would fake extra samples, so a changed frame
+    # gets a full detection instead of a partial one.)
+    # Every confirmed can must be re-observed every REOBSERVE_FRAMES, so a
+    # removed can is noticed even if the gate missed the change.
+    mode = None
+    if gate is not None:
+        if cans and all(is_done(t) for t in cans):
+            if since_detect >= REOBSERVE_FRAMES:
+                gate.reset()   # → full pass
+            mode = gate.check(frame)[0]
+        else:
+            gate.reset()
+    if mode != STATIC:
+        circles = detector.detect(frame)
+        since_detect = 0
+
+        # KEEP FLOATS — sub-pixel centres go straight into the estimators
+        tracker.update(circles[:, :2])
+    else:
+        # same detections again: keeps the tracks alive, and a can that
+        # vanished in the last real detection keeps collecting misses
+        since_detect += 1
+        tracker.update(circles[:, :2], sample=False)
+    cans = tracker.confirmed()
+
+    fps = status.tick()
+    if fps is not None:
+        print(summary(cans, fps))
+
+    # Overlay only every few frames, and never in headless mode
+    if preview.due() and preview.show(draw(frame, cans)) == ord('q'):
         print("\n🛑 Detection aborted.")
         break
 
-cap.release()
-cv2.destroyAllWindows()
+    # Service mode: publish whatever has converged, every PUBLISH_INTERVAL
+    if CONTINUOUS:
+        if ts - last_publish >= PUBLISH_INTERVAL:
+            # a can missing from this frame may already be gone: leave it out
+            ready = [t for t in cans if t.misses == 0 and is_done(t)]
+            publish([result(t) for t in ready], captured_at=ts, source="detection_average")
+            last_publish = ts
+
+    # Check if ALL cans have converged (or hit the sample limit)
+    elif len(cans) > 0 and all(is_done(t) for t in cans):
+        print(f"\n🎉 All cans converged after {max(t.n for t in cans)} samples! Publishing...")
+
+        results = [result(t) for t in cans]
+        for t, (avg_x, avg_y, confidence) in zip(cans, results):
+            print(f"📝 CAN {t.id} averaged pixel coords: {avg_x:.4f}, {avg_y:.4f} "
+                  f"({t.n} samples, confidence {confidence:.2f})")
+
+        publish(results, captured_at=ts, source="detection_average")
+
+        print(f"⏱️ Detector: {detector.timing_report()}")
+        print("🛑 Detection completed — exiting.\n")
+        break
+
+source.stop()
+preview.close()
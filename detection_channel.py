@@ -0,0 +1,151 @@
+# ---------------------------------------------
+# detection_channel.py — hand detections from the camera scripts to robot.py
+# publish():  atomic write (temp file + rename) of a JSON message, plus a
+#             Unix datagram to wake a waiting subscriber immediately; the
+#             datagram is sent non-blocking and dropped if the queue is full
+# subscribe:  DetectionSubscriber.wait() blocks on the socket; where Unix
+#             sockets are unavailable it falls back to watching the file
+# ---------------------------------------------
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+
+from atomic_file import atomic_write
+
+CHANNEL_FILE = "detected_coords.json"
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "canstacker_detections.sock")
+POLL_INTERVAL = 0.05   # s, file fallback only
+
+_seq = 0
+
+
+def publish(cans, captured_at=None, source="detector", path=CHANNEL_FILE, socket_path=SOCKET_PATH):
+    """
+    cans: [(u, v, confidence), ...] in px. Readers never see a half-written
+    file: the message is written to a temp file and renamed over the old one.
+    """
+    global _seq
+    _seq += 1
+    now = time.time()
+
+    msg = {
+        "seq": _seq,
+        "pid": os.getpid(),
+        "source": source,
+        "timestamp": now,
+        "captured_at": captured_at if captured_at is not None else now,
+        "cans": [{"u": float(u), "v": float(v), "confidence": float(c)} for u, v, c in cans],
+    }
+    data = json.dumps(msg)
+
+    with atomic_write(path, fsync=True) as f:
+        f.write(data)
+
+    _notify(data, socket_path)
+    return msg
+
+
+def _notify(data, socket_path):
+    if not hasattr(socket, "AF_UNIX"):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+            s.setblocking(False)
+            s.sendto(data.encode(), socket_path)
+    except BlockingIOError:
+        pass   # subscriber's queue is full — it reads the file when it catches up
+    except OSError:
+        pass   # nobody listening — the file is still there
+
+
+def read_latest(path=CHANNEL_FILE):
+    """Returns the last published message, or None."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class DetectionSubscriber:
+    """
+    with DetectionSubscriber() as sub:
+        msg = sub.wait(newer_than=0)      # blocks until a message exists
+        msg = await sub.wait_async(...)
+    """
+
+    def __init__(self, path=CHANNEL_FILE, socket_path=SOCKET_PATH):
+        self.path = path
+        self.socket_path = socket_path
+        self.sock = None
+
+        if hasattr(socket, "AF_UNIX"):
+            try:
+                if os.path.exists(socket_path):
+                    os.unlink(socket_path)
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self.sock.bind(socket_path)
+            except OSError:
+                self.sock = None   # e.g. Windows: no Unix datagrams
+
+    def wait(self, newer_than=0.0, timeout=None):
+        """
+        Returns the first message with timestamp > newer_than, or None on timeout.
+        A message already on disk counts, so nothing published earlier is missed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        msg = read_latest(self.path)
+        if msg is not None and msg["timestamp"] > newer_than:
+            return msg
+
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+
+            if self.sock is not None:
+                self.sock.settimeout(remaining)
+                try:
+                    self.sock.recv(1 << 20)
+                except socket.timeout:
+                    return None
+                self._drain()
+                msg = read_latest(self.path)   # the file is the source of truth
+            else:
+                time.sleep(POLL_INTERVAL if remaining is None else min(POLL_INTERVAL, remaining))
+                msg = read_latest(self.path)
+
+            if msg is not None and msg["timestamp"] > newer_than:
+                return msg
+
+    def _drain(self):
+        # older notifications queued while nobody was reading say nothing new
+        self.sock.setblocking(False)
+        try:
+            while True:
+                self.sock.recv(1 << 20)
+        except OSError:
+            pass
+
+    async def wait_async(self, newer_than=0.0, timeout=None):
+        return await asyncio.to_thread(self.wait, newer_than, timeout)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,207 @@
+# ---------------------------------------------
+# detection_log.py — buffered detection logging off the frame loop
+# Records are collected per frame as NumPy arrays and written by a
+# background thread every FLUSH_INTERVAL seconds. Format by extension:
+#   .csv      text, fixed precision; a killed run loses at most one flush
+#   .npz      structured array chunks (np.load-able); the zip is closed after
+#             every flush, a kill can only break the flush in progress
+#   .parquet  columnar, needs pyarrow; only readable after close(), so
+#             not for runs that may be killed
+# Columns: timestamp, type, x, y, size, confidence. The detections.csv of
+# older versions named x, y "x_cm", "y_cm"; load_detections(path) reads
+# that and every format above back into one structured array.
+# ---------------------------------------------
+import csv
+import os
+import threading
+import warnings
+import zipfile
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FLUSH_INTERVAL = 1.0   # s
+CSV_PRECISION = 3      # decimals in text output
+
+KINDS = ("circle", "black_rectangle")   # "type" column, stored as a small int
+
+RECORD = np.dtype([
+    ("timestamp", "f8"),
+    ("type", "u1"),
+    ("x", "f4"),
+    ("y", "f4"),
+    ("size", "f4"),
+    ("confidence", "f4"),
+])
+CSV_HEADER = ["timestamp", "type", "x", "y", "size", "confidence"]
+
+
+def records(timestamp, kind, x, y, size, confidence=1.0):
+    """Structured array for all detections of one kind in one frame (x, y, size are arrays)."""
+    x = np.asarray(x, dtype=np.float32).ravel()
+    out = np.empty(len(x), RECORD)
+    out["timestamp"] = timestamp
+    out["type"] = KINDS.index(kind)
+    out["x"] = x
+    out["y"] = y
+    out["size"] = size
+    out["confidence"] = confidence
+    return out
+
+
+class DetectionLog:
+    """
+    with DetectionLog("detections.npz") as log:
+        log.add(ts, "circle", xs, ys, radii)      # cheap: appends to a list
+    Writes happen on a background thread; close() flushes the rest.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.fmt = os.path.splitext(path)[1].lower().lstrip(".")
+        if self.fmt not in ("csv", "npz", "parquet"):
+            raise ValueError(f"Unknown log format: {path}")
+        if self.fmt == "parquet" and pq is None:
+            raise ImportError("Writing .parquet logs needs pyarrow (pip install pyarrow)")
+
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = True
+        self.written = 0       # records on disk
+        self.chunks = 0
+
+        self._open()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # -----------------------------------------
+    # Frame loop side
+    # -----------------------------------------
+    def add(self, timestamp, kind, x, y, size, confidence=1.0):
+        if len(np.atleast_1d(x)) == 0:
+            return
+        self.extend(records(timestamp, kind, x, y, size, confidence))
+
+    def extend(self, recs):
+        with self.lock:
+            self.pending.append(recs)
+
+    # -----------------------------------------
+    # Writer thread
+    # -----------------------------------------
+    def _run(self):
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
+        data = np.concatenate(batch)
+
+        if self.fmt == "csv":
+            self._write_csv(data)
+        elif self.fmt == "npz":
+            self._write_npz(data)
+        else:
+            self._write_parquet(data)
+        self.written += len(data)
+        self.chunks += 1
+
+    def _open(self):
+        if self.fmt == "csv":
+            self.file = open(self.path, "w", newline="")
+            csv.writer(self.file).writerow(CSV_HEADER)
+        elif self.fmt == "npz":
+            # an npz is a zip of .npy files: every flush appends one chunk and
+            # rewrites the central directory (see _write_npz)
+            zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED).close()
+            self.file = None
+        else:
+            self.file = pq.ParquetWriter(self.path, _arrow_schema())
+
+    def _write_csv(self, data):
+        f = f"%.{CSV_PRECISION}f"
+        writer = csv.writer(self.file)
+        writer.writerows(
+            (f"{r['timestamp']:.3f}", KINDS[r["type"]], f % r["x"], f % r["y"], f % r["size"], f"{r['confidence']:.2f}")
+            for r in data
+        )
+        self.file.flush()
+
+    def _write_npz(self, data):
+        with zipfile.ZipFile(self.path, "a", zipfile.ZIP_STORED) as archive:
+            with archive.open(f"chunk_{self.chunks:06d}.npy", "w") as member:
+                np.lib.format.write_array(member, data, allow_pickle=False)
+
+    def _write_parquet(self, data):
+        columns = {name: data[name] for name in RECORD.names}
+        self.file.write_table(pa.table(columns, schema=_arrow_schema()))
+
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _arrow_schema():
+    return pa.schema([(name, pa.from_numpy_dtype(RECORD[name])) for name in RECORD.names])
+
+
+# -----------------------------------------
+# Loading
+# -----------------------------------------
+def load_detections(path):
+    """Whole log as one structured array (dtype RECORD), whatever the format."""
+    fmt = os.path.splitext(path)[1].lower()
+
+    if fmt == ".npz":
+        with np.load(path) as chunks:
+            parts = [chunks[k] for k in sorted(chunks.files)]
+        return np.concatenate(parts) if parts else np.empty(0, RECORD)
+
+    if fmt == ".parquet":
+        if pq is None:
+            raise ImportError("Reading .parquet logs needs pyarrow (pip install pyarrow)")
+        table = pq.read_table(path)
+        out = np.empty(table.num_rows, RECORD)
+        for name in RECORD.names:
+            out[name] = table.column(name).to_numpy()
+        return out
+
+    # CSV: column-wise parse, type names mapped back to codes
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", "genfromtxt: Empty input file")
+        raw = np.genfromtxt(path, delimiter=",", skip_header=1, dtype=None, encoding="utf-8",
+                            names=CSV_HEADER, ndmin=1)
+    if raw.size == 0:
+        return np.empty(0, RECORD)   # header only: a run without detections
+    out = np.empty(len(raw), RECORD)
+    for name in RECORD.names:
+        if name == "type":
+            out[name] = [KINDS.index(k) for k in raw[name]]
+        else:
+            out[name] = raw[name]
+    return out
@@ -1,50 +1,37 @@
 import cv2
 import numpy as np
+from can_detection import CanDetector
+from detection_channel import publish
+from frame_source import FrameSource
+from preview import Preview
 
-OUTPUT_FILE = "detected_coords.txt"
 CAMERA_SOURCE = 0
 
-# Expected radius range for cans
-RADIUS_MIN = 39
-RADIUS_MAX = 44
+# Detector speed-ups (radius range etc. live in can_detection.py)
+USE_ROI = False       # True: only search the calibrated workspace
+COARSE_SCALE = None   # e.g. 0.5: Hough on a half-size image, refined at full size; None = off
+BACKEND = "hough"     # or "hough_alt" / "contour" / "chamfer", compare with bench_vision.py --compare
+UNDISTORT_FRAMES = False   # detect on lens-corrected frames (remap); centres are corrected either way
 
-def detect_once():
-    """Captures one frame, detects cans, returns annotated image and circle list."""
-    cap = cv2.VideoCapture(CAMERA_SOURCE)
-    if not cap.isOpened():
-        print("❌ Could not open camera.")
-        exit()
-
-    ret, frame = cap.read()
-    cap.release()
-    if not ret:
+def detect_once(source):
+    """Takes the newest frame, detects cans, returns annotated image, circle list and capture time."""
+    item = source.read(after=source.seq)   # a frame captured after this call
+    if item is None:
         print("❌ Failed to capture frame.")
-        return None, []
+        return None, [], None
+    _, ts, frame = item
 
     frame = cv2.resize(frame, (960, 540))
-    annotated = frame.copy()
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    blur = cv2.medianBlur(gray, 7)
-
-    circles = cv2.HoughCircles(
-        blur,
-        cv2.HOUGH_GRADIENT,
-        dp=1.2,
-        minDist=60,
-        param1=100,
-        param2=30,
-        minRadius=RADIUS_MIN,
-        maxRadius=RADIUS_MAX
-    )
 
-    if circles is not None:
-        # KEEP FLOATS — no rounding, no uint16
-        circles = circles[0]
+    circles = detector.detect(frame)
+    print(f"⏱️ Detector: {detector.timing_report()}")
 
-        # sort left → right
-        circles = sorted(circles, key=lambda c: c[0])
+    if not preview.enabled:
+        return frame, circles, ts
+    annotated = frame.copy()
 
+    # KEEP FLOATS — no rounding, no uint16 (already sorted left → right)
+    if len(circles) > 0:
         # draw detections (convert to int for display only)
         for idx, (x, y, r) in enumerate(circles):
             cv2.circle(annotated, (int(x), int(y)), int(r), (0, 255, 0), 2)
@@ -59,39 +46,53 @@ def detect_once():
                 2
             )
 
-    return annotated, circles if circles is not None else []
+    return annotated, circles, ts
+
 
+detector = CanDetector(roi=USE_ROI, coarse_scale=COARSE_SCALE, backend=BACKEND,
+                       undistort=UNDISTORT_FRAMES)
+preview = Preview("Detection Preview", every=1)
+
+# Camera stays open across retries
+source = FrameSource(CAMERA_SOURCE).start()
+if not source.opened:
+    print("❌ Could not open camera.")
+    exit()
 
 print("📸 One-shot can detection started.")
 
 while True:
-    annotated, circles = detect_once()
+    annotated, circles, ts = detect_once(source)
 
     if annotated is None:
         continue
 
     # Show result
-    cv2.imshow("Detection Preview", annotated)
     print(f"Detected {len(circles)} cans.")
+    for idx, (x, y, r) in enumerate(circles):
+        print(f"   CAN {idx}: ({x:.1f}, {y:.1f}) r={r:.1f}")
 
     print("❓ Is the detection good? (y/n)")
+    preview.show(annotated)
     key = None
     while key not in ['y', 'n']:
-        key = chr(cv2.waitKey(0) & 0xFF)
+        # headless: no window, answer on the console (snapshot in PREVIEW_FILE, if set)
+        key = input().strip().lower()[:1] if preview.headless else chr(cv2.waitKey(0) & 0xFF)
 
     if key == 'y' and len(circles) > 0:
         # Save coords (FULL FLOAT VALUES)
-        with open(OUTPUT_FILE, "w") as f:
-            for idx, (x, y, r) in enumerate(circles):
-                f.write(f"{x:.4f} {y:.4f}\n")
-                print(f"📝 Saved CAN {idx} -> ({x:.4f}, {y:.4f})")
+        # confirmed by eye → full confidence
+        publish([(x, y, 1.0) for x, y, r in circles], captured_at=ts, source="detection_one_picture")
+        for idx, (x, y, r) in enumerate(circles):
+            print(f"📝 Saved CAN {idx} -> ({x:.4f}, {y:.4f})")
 
         print("✅ Saved coordinates and exiting.")
         break
 
     else:
         print("🔁 Retrying...")
-        cv2.destroyWindow("Detection Preview")
+        preview.close()
         continue
 
-cv2.destroyAllWindows()
\ No newline at end of file
+source.stop()
+preview.close()
\ No newline at end of file
@@ -0,0 +1,120 @@
+# ---------------------------------------------
+# frame_source.py — camera capture on a background thread
+# The device is opened once; readers always get the newest frame
+# (old frames are dropped) together with its capture timestamp.
+# ---------------------------------------------
+import threading
+import time
+from collections import deque
+
+import cv2
+
+import metrics
+
+CAMERA_SOURCE = 0
+
+
+class FrameSource:
+    """
+    with FrameSource(CAMERA_SOURCE) as source:
+        if not source.opened: ...
+        for seq, ts, frame in source.frames():
+            ...
+    """
+
+    def __init__(self, source=CAMERA_SOURCE, buffer_size=2):
+        self.source = source
+        self.buffer = deque(maxlen=buffer_size)   # (seq, timestamp, frame)
+        self.cond = threading.Condition()
+        self.cap = None
+        self.thread = None
+        self.running = False
+        self.opened = False
+
+        self.seq = 0          # frames captured so far
+        self.delivered = 0    # distinct frames handed to readers
+        self._last_read = 0
+
+    # -----------------------------------------
+    # Lifecycle
+    # -----------------------------------------
+    def start(self):
+        self.cap = cv2.VideoCapture(self.source)
+        self.opened = self.cap.isOpened()
+        if not self.opened:
+            return self
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        if self.cap is not None:
+            self.cap.release()
+        with self.cond:
+            self.cond.notify_all()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # -----------------------------------------
+    # Capture thread
+    # -----------------------------------------
+    def _run(self):
+        while self.running:
+            with metrics.timer("capture"):
+                ret, frame = self.cap.read()
+            ts = time.time()
+            if not ret:
+                time.sleep(0.005)
+                continue
+
+            with self.cond:
+                self.seq += 1
+                self.buffer.append((self.seq, ts, frame))
+                self.cond.notify_all()
+
+    @property
+    def dropped(self):
+        """Frames that were replaced by a newer one before anyone read them."""
+        return self.seq - self.delivered
+
+    # -----------------------------------------
+    # Readers
+    # -----------------------------------------
+    def read(self, after=0, timeout=1.0):
+        """
+        Returns the newest (seq, timestamp, frame) with seq > `after`,
+        waiting up to `timeout` s for one. Returns None on timeout.
+        """
+        with self.cond:
+            ok = self.cond.wait_for(
+                lambda: not self.running or (self.buffer and self.buffer[-1][0] > after),
+                timeout
+            )
+            if not ok or not self.buffer or self.buffer[-1][0] <= after:
+                return None
+
+            item = self.buffer[-1]
+            if item[0] > self._last_read:
+                self._last_read = item[0]
+                self.delivered += 1
+            return item
+
+    def frames(self):
+        """Yields every new frame the consumer is fast enough to see; stale ones are skipped."""
+        seq = 0
+        while self.running:
+            item = self.read(after=seq)
+            if item is None:
+                continue
+            seq = item[0]
+            yield item
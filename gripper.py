@@ -0,0 +1,110 @@
+# ---------------------------------------------
+# gripper.py — gripper controller with a locally cached state
+# open() / close() only send the command; the state is remembered from
+# what was commanded, so toggle() needs no GET /gripper round trip.
+# The cache is re-read from the server only when it is unknown (start-up,
+# after a failed command) or older than STALE_AFTER.
+# ---------------------------------------------
+import time
+
+GRIPPER_OPEN = 630
+GRIPPER_CLOSED = 800
+
+STALE_AFTER = 60.0    # s, re-read the real state before trusting an older cache
+GRASP_MARGIN = 15     # closed this far short of GRIPPER_CLOSED = fingers stopped on a can
+
+
+class GraspError(RuntimeError):
+    """The gripper closed on nothing, or rejected the command."""
+
+
+class Gripper:
+    """
+    gripper = Gripper(client)
+    gripper.sync()        # once after connecting
+    gripper.close()       # no read
+    gripper.holding()     # True / False, None when the API cannot tell
+    """
+
+    def __init__(self, client, open_value=GRIPPER_OPEN, closed_value=GRIPPER_CLOSED,
+                 stale_after=STALE_AFTER, confirm=False):
+        self.client = client
+        self.open_value = open_value
+        self.closed_value = closed_value
+        self.stale_after = stale_after
+        # True only if GET /gripper reports where the fingers actually are,
+        # not just the last command
+        self.confirm = confirm
+
+        self.value = None      # last commanded / read value, None = unknown
+        self.updated = 0.0     # time.monotonic() of that
+        self.syncs = 0         # reads from the server, for the logs
+
+    # -----------------------------------------
+    # State
+    # -----------------------------------------
+    def sync(self):
+        """Reads the real state from the server. Returns the value (None if the read failed)."""
+        self.syncs += 1
+        self._remember(self.client.get_gripper())
+        return self.value
+
+    def invalidate(self):
+        self.value = None
+
+    def _remember(self, value):
+        self.value = value
+        self.updated = time.monotonic()
+
+    @property
+    def stale(self):
+        return self.value is None or time.monotonic() - self.updated > self.stale_after
+
+    def is_open(self):
+        """Open unless (last known) closed. Re-syncs first if the cache is stale."""
+        if self.stale:
+            self.sync()
+        if self.value is None:
+            return False   # unknown: same as the old toggle(), which then opened
+        return abs(self.value - self.open_value) < abs(self.value - self.closed_value)
+
+    # -----------------------------------------
+    # Commands
+    # -----------------------------------------
+    def _send(self, value):
+        try:
+            code = self.client.put_gripper(value)
+        except Exception:
+            self.invalidate()
+            raise
+        if code != 200:
+            print(f"⚠️ Gripper command {value} failed ({code}), state will be re-read.")
+            self.invalidate()
+            return False
+        self._remember(value)
+        return True
+
+    def open(self):
+        return self._send(self.open_value)
+
+    def close(self):
+        return self._send(self.closed_value)
+
+    def toggle(self):
+        if self.is_open():
+            print("🤏 Closing gripper")
+            return self.close()
+        print("👐 Opening gripper")
+        return self.open()
+
+    def holding(self):
+        """
+        Whether a closed gripper has something between its fingers (call after
+        the fingers settled). None when confirm is off or the read failed.
+        """
+        if not self.confirm:
+            return None
+        value = self.sync()
+        if value is None:
+            return None
+        return self.open_value + GRASP_MARGIN < value < self.closed_value - GRASP_MARGIN
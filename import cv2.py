@@ -1,104 +1,77 @@
-import cv2
 import numpy as np
-import csv
-import time
+from change_gate import ChangeGate
+from coord_transform import camera_to_robot_batch
+from detection_log import DetectionLog
+from frame_source import FrameSource
+from object_detection import REGION_MARGIN, draw
+from preview import Preview, StatusLog
+from vision_pipeline import DEFAULT_WORKERS, DetectionPipeline
 
 # --- Configuration ---
 CAMERA_SOURCE = 0  # or your IP camera URL
-CM_PER_PIXEL = 21 / 367  # = 0.055 cm per pixel
-MIN_BLACK_AREA = 1000
-
-# --- Open camera ---
-cap = cv2.VideoCapture(CAMERA_SOURCE)
-if not cap.isOpened():
-    print("❌ Could not open camera.")
-    exit()
-print("✅ Camera stream opened. Press 'q' to quit.")
-
-# --- Prepare CSV output ---
-csv_file = open("detections.csv", mode="w", newline="")
-csv_writer = csv.writer(csv_file)
-csv_writer.writerow(["timestamp", "type", "x_cm", "y_cm", "size", "confidence"])
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("⚠️ Frame not received.")
-        continue
-
-    frame = cv2.resize(frame, (960, 540))
-    annotated = frame.copy()
-
-    FRAME_CENTER_X = frame.shape[1] / 2
-    FRAME_CENTER_Y = frame.shape[0] / 2
-
-    # --- Circle detection ---
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    blur = cv2.medianBlur(gray, 7)
-
-    circles = cv2.HoughCircles(
-        blur,
-        cv2.HOUGH_GRADIENT,
-        dp=1.2,
-        minDist=50,
-        param1=100,
-        param2=30,
-        minRadius=15,
-        maxRadius=150
-    )
-
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
-        for (x, y, r) in circles[0, :]:
-            # Convert pixel → cm
-            x_cm = (x - FRAME_CENTER_X) * CM_PER_PIXEL
-            y_cm = (y - FRAME_CENTER_Y) * CM_PER_PIXEL
-
-            # Draw and label
-            cv2.circle(annotated, (x, y), r, (0, 255, 0), 3)
-            cv2.circle(annotated, (x, y), 3, (0, 0, 255), -1)
-            cv2.putText(annotated, f"circle", (x - 25, y - r - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-            print(f"⭕ Circle at ({x_cm:.2f}, {y_cm:.2f}) cm, radius={r}px")
-            csv_writer.writerow([time.time(), "circle", x_cm, y_cm, r, 1.0])
-
-    # --- Black object detection ---
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    lower_black = np.array([0, 0, 0])
-    upper_black = np.array([180, 255, 70])
-    mask_black = cv2.inRange(hsv, lower_black, upper_black)
-
-    kernel = np.ones((7, 7), np.uint8)
-    mask_black = cv2.morphologyEx(mask_black, cv2.MORPH_OPEN, kernel)
-    mask_black = cv2.morphologyEx(mask_black, cv2.MORPH_CLOSE, kernel)
-
-    contours, _ = cv2.findContours(mask_black, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area < MIN_BLACK_AREA:
-            continue
-
-        x, y, w, h = cv2.boundingRect(cnt)
-        cx, cy = x + w // 2, y + h // 2
-
-        x_cm = (cx - FRAME_CENTER_X) * CM_PER_PIXEL
-        y_cm = (cy - FRAME_CENTER_Y) * CM_PER_PIXEL
-
-        cv2.rectangle(annotated, (x, y), (x + w, y + h), (255, 0, 0), 3)
-        cv2.putText(annotated, "black rectangle", (x, y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-
-        print(f"⬛ Black rectangle at ({x_cm:.2f}, {y_cm:.2f}) cm, area={area}")
-        csv_writer.writerow([time.time(), "black_rectangle", x_cm, y_cm, area, 1.0])
-
-    # --- Display ---
-    cv2.imshow("Object Detector (press 'q' to quit)", annotated)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-csv_file.close()
-cap.release()
-cv2.destroyAllWindows()
-print("💾 Data saved to detections.csv")
+# Written in the background, .csv / .npz / .parquet (see detection_log.py).
+# Columns timestamp, type, x, y, size, confidence; x, y are robot mm (they
+# used to be "x_cm", "y_cm" from the frame centre), size is px.
+LOG_FILE = "detections.csv"
+WORKERS = DEFAULT_WORKERS    # detection processes (circles + black objects)
+USE_GATE = True              # skip / localise detection while the table is static
+
+
+def main():
+    # --- Start the detection workers before the camera thread exists ---
+    gate = ChangeGate(margin=REGION_MARGIN) if USE_GATE else None
+    pipeline = DetectionPipeline(workers=WORKERS, gate=gate).start()
+
+    # --- Open camera ---
+    source = FrameSource(CAMERA_SOURCE).start()
+    if not source.opened:
+        print("❌ Could not open camera.")
+        pipeline.stop()
+        return
+    print(f"✅ Camera stream opened, {WORKERS} detection workers. Press 'q' (or Ctrl+C) to quit.")
+
+    # --- Buffered detection log (see detection_log.load_detections) ---
+    log = DetectionLog(LOG_FILE)
+
+    preview = Preview("Object Detector (press 'q' to quit)")
+    status = StatusLog()
+    n_circles = n_boxes = 0
+
+    frames = ((ts, frame) for _, ts, frame in source.frames())
+    results = pipeline.run(frames)
+    try:
+        # frames arrive resized to 960×540, in capture order
+        for _, ts, frame, (circles, boxes) in results:
+            # --- Pixel → robot mm through the calibrated homography, one call per frame ---
+            world = camera_to_robot_batch(np.concatenate([circles[:, :2], boxes[:, 5:7]]))
+            n = len(circles)
+
+            # size stays in pixels: radius for circles, blob area for black objects
+            log.add(ts, "circle", world[:n, 0], world[:n, 1], circles[:, 2])
+            log.add(ts, "black_rectangle", world[n:, 0], world[n:, 1], boxes[:, 4])
+
+            # --- Periodic summary instead of a line per object ---
+            n_circles += len(circles)
+            n_boxes += len(boxes)
+            fps = status.tick()
+            if fps is not None:
+                print(f"📊 {fps:.1f} FPS — {n_circles} circles, {n_boxes} black rectangles logged")
+                print(f"   pipeline: {pipeline.report()}, camera dropped {source.dropped}")
+
+            # --- Draw, label and display (subsampled, skipped when headless) ---
+            if preview.due() and preview.show(draw(frame.copy(), circles, boxes)) == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass   # headless: stop with Ctrl+C
+    finally:
+        # also on a WorkerError: keep what was logged, free the shared memory
+        log.close()
+        source.stop()
+        results.close()      # stops the feeder thread
+        pipeline.stop()
+        preview.close()
+        print(f"💾 {log.written} detections saved to {LOG_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# ---------------------------------------------
+# metrics.py — latency histograms for the vision and robot code
+# Off unless CANSTACKER_METRICS=1 (or enable()); when off, timer() hands
+# out one shared no-op object and @timed costs a flag check.
+#
+#   with metrics.timer("vision.hough"): ...
+#   @metrics.timed("http.get_tcp")
+#   metrics.observe("vision.resize", seconds)
+#
+# start_exporter() appends a snapshot to a rolling JSON-lines file and
+# rewrites a Prometheus text file every EXPORT_INTERVAL seconds.
+# ---------------------------------------------
+import bisect
+import functools
+import json
+import os
+import re
+import threading
+import time
+
+from atomic_file import atomic_write
+
+METRICS_FILE = "metrics.jsonl"
+PROMETHEUS_FILE = "metrics.prom"
+EXPORT_INTERVAL = 10.0            # s
+MAX_FILE_BYTES = 5 * 1024 * 1024  # JSON-lines file rolls over to .1 above this
+
+# Histogram bucket upper bounds in seconds (100 µs … 30 s)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = os.environ.get("CANSTACKER_METRICS", "0") == "1"
+_histograms = {}
+_lock = threading.Lock()
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+class Histogram:
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(BUCKETS) + 1)   # last one: above the largest bucket
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """q-quantile estimated from the buckets (linear inside a bucket, clamped to min/max)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, n in zip(BUCKETS + (self.max,), self.counts):
+            if n and seen + n >= rank:
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+            lower = upper
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": self.counts[:],
+        }
+
+
+# -----------------------------------------
+# Recording
+# -----------------------------------------
+def observe(name, seconds):
+    if not _enabled:
+        return
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = Histogram(name)
+        h.add(seconds)
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullTimer()
+
+
+def timer(name):
+    """Context manager timing its block into histogram `name`."""
+    return _Timer(name) if _enabled else _NULL
+
+
+def timed(name):
+    """Decorator: times every call of the function into histogram `name`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - t0)
+        return inner
+    return wrap
+
+
+# -----------------------------------------
+# Reading / export
+# -----------------------------------------
+def snapshot():
+    with _lock:
+        return {name: h.snapshot() for name, h in sorted(_histograms.items())}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def summary():
+    snap = snapshot()
+    if not snap:
+        return "no metrics recorded" + ("" if _enabled else " (disabled — set CANSTACKER_METRICS=1)")
+
+    width = max(len(n) for n in snap) + 2
+    lines = [f"{'metric':<{width}}{'count':>8}{'mean ms':>10}{'p50':>10}{'p95':>10}{'max':>10}{'total s':>10}"]
+    for name, s in snap.items():
+        mean = s["sum"] / s["count"] * 1e3
+        lines.append(f"{name:<{width}}{s['count']:>8}{mean:>10.2f}{s['p50'] * 1e3:>10.2f}"
+                     f"{s['p95'] * 1e3:>10.2f}{s['max'] * 1e3:>10.2f}{s['sum']:>10.2f}")
+    return "\n".join(lines)
+
+
+def write_jsonl(path=METRICS_FILE, max_bytes=MAX_FILE_BYTES):
+    """Appends one snapshot line; the file rolls over to `path`.1 when it gets too big."""
+    line = json.dumps({"timestamp": time.time(), "pid": os.getpid(), "metrics": snapshot()})
+    if os.path.exists(path) and os.path.getsize(path) + len(line) > max_bytes:
+        os.replace(path, path + ".1")
+    with open(path, "a") as f:
+        f.write(line + "\n")
+
+
+def prometheus_text():
+    out = []
+    for name, s in snapshot().items():
+        metric = "canstacker_" + re.sub(r"[^a-zA-Z0-9_]", "_", name) + "_seconds"
+        out.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS, s["buckets"]):
+            cumulative += n
+            out.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        out.append(f'{metric}_bucket{{le="+Inf"}} {s["count"]}')
+        out.append(f"{metric}_sum {s['sum']}")
+        out.append(f"{metric}_count {s['count']}")
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(path=PROMETHEUS_FILE):
+    # the node exporter textfile collector must never read half a file
+    with atomic_write(path) as f:
+        f.write(prometheus_text())
+
+
+def start_exporter(interval=EXPORT_INTERVAL, jsonl=METRICS_FILE, prometheus=PROMETHEUS_FILE):
+    """Background thread writing both files every `interval` s. Does nothing while disabled."""
+    if not _enabled:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            if jsonl:
+                write_jsonl(jsonl)
+            if prometheus:
+                write_prometheus(prometheus)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,320 @@
+# ---------------------------------------------
+# mock_cherrybot.py — local simulator of the cherrybot API
+# Same endpoints as the real robot. Moves take realistic time (trapezoid
+# velocity profile from the "speed" field), with optional network latency
+# and injected 503 faults.
+#
+# Run:   python mock_cherrybot.py [port] [--instant] [--latency 0.03] [--fault-rate 0.02]
+# Then:  CHERRYBOT_URL=http://127.0.0.1:8080/cherrybot python robot.py
+# ---------------------------------------------
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "/cherrybot"
+
+HOME_TCP = {
+    "coordinate": {"x": 0.0, "y": -450.0, "z": 300.0},
+    "rotation": {"roll": 180.0, "pitch": 0.0, "yaw": 180.0},
+}
+AXES = (("coordinate", "x"), ("coordinate", "y"), ("coordinate", "z"),
+        ("rotation", "roll"), ("rotation", "pitch"), ("rotation", "yaw"))
+
+ACCEL = 400.0          # mm/s², arm acceleration / deceleration
+YAW_SPEED = 45.0       # deg/s, for moves that only rotate
+GRIPPER_TIME = 0.6     # s, fingers fully open ↔ closed
+
+
+def _flat(tcp):
+    return [float(tcp[a][b]) for a, b in AXES]
+
+
+def _nested(values):
+    tcp = {"coordinate": {}, "rotation": {}}
+    for (a, b), v in zip(AXES, values):
+        tcp[a][b] = v
+    return tcp
+
+
+def move_duration(distance, speed, accel=ACCEL):
+    """Time for a trapezoid (or triangle) velocity profile over `distance` mm."""
+    if distance <= 0:
+        return 0.0
+    if distance < speed * speed / accel:
+        return 2 * math.sqrt(distance / accel)       # never reaches full speed
+    return distance / speed + speed / accel
+
+
+def _progress(t, duration, distance, speed, accel=ACCEL):
+    """Fraction of the move done after t seconds."""
+    if t >= duration or distance <= 0:
+        return 1.0
+    v_peak = min(speed, math.sqrt(distance * accel))
+    t_acc = v_peak / accel
+    t_flat = duration - 2 * t_acc
+
+    if t < t_acc:
+        s = 0.5 * accel * t * t
+    elif t < t_acc + t_flat:
+        s = 0.5 * accel * t_acc * t_acc + v_peak * (t - t_acc)
+    else:
+        left = duration - t
+        s = distance - 0.5 * accel * left * left
+    return min(s / distance, 1.0)
+
+
+class RobotState:
+    def __init__(self, instant=False):
+        self.lock = threading.Lock()
+        self.instant = instant
+        self.operator = None
+
+        # for tests
+        self.requests = Counter()   # (method, path) → requests received
+        self.connections = 0        # TCP connections accepted
+        self.fail_next = 0          # answer this many upcoming requests with 503
+
+        self.start = _flat(HOME_TCP)
+        self.target = list(self.start)
+        self.move_t0 = 0.0
+        self.move_duration = 0.0
+        self.move_distance = 0.0
+        self.move_speed = 1.0
+
+        self.gripper_from = 630
+        self.gripper = 630
+        self.gripper_t0 = 0.0
+
+        self.moves = 0
+        self.motion_time = 0.0   # s the arm actually spent moving
+
+    # -----------------------------------------
+    # Kinematics
+    # -----------------------------------------
+    def tcp(self, now=None):
+        if self.instant:
+            return list(self.target)
+        now = time.monotonic() if now is None else now
+        f = _progress(now - self.move_t0, self.move_duration, self.move_distance, self.move_speed)
+        return [a + (b - a) * f for a, b in zip(self.start, self.target)]
+
+    def set_target(self, target, speed):
+        now = time.monotonic()
+        self.start = self.tcp(now)       # a new target interrupts the current move
+        self.motion_time -= max(0.0, self.move_t0 + self.move_duration - now)
+        self.target = target
+        self.move_t0 = now
+        self.move_speed = max(float(speed or 100), 1.0)
+        self.move_distance = math.dist(self.start[:3], target[:3])
+
+        turn = max(abs(a - b) for a, b in zip(self.start[3:], target[3:]))
+        self.move_duration = max(move_duration(self.move_distance, self.move_speed), turn / YAW_SPEED)
+        if self.move_distance == 0 and turn > 0:
+            # rotation only: progress by time
+            self.move_distance = 1.0
+            self.move_speed = 1.0 / self.move_duration
+        self.motion_time += self.move_duration
+        self.moves += 1
+
+    def gripper_value(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.instant or now - self.gripper_t0 >= GRIPPER_TIME:
+            return self.gripper
+        return self.gripper_from
+
+    def set_gripper(self, value):
+        now = time.monotonic()
+        self.gripper_from = self.gripper_value(now)
+        self.gripper = value
+        self.gripper_t0 = now
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True
+    state = None
+    latency = 0.0       # s, added to every response
+    jitter = 0.0        # s, uniform extra latency
+    fault_rate = 0.0    # share of requests answered with 503
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    # -----------------------------------------
+    # Helpers
+    # -----------------------------------------
+    def _path(self):
+        path = self.path.split("?")[0]
+        return path[len(PREFIX):] if path.startswith(PREFIX) else path
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, code, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _network(self):
+        """Simulated latency and faults. Returns False if the request was failed."""
+        s = self.state
+        with s.lock:
+            s.requests[(self.command, self._path())] += 1
+            forced = s.fail_next > 0
+            if forced:
+                s.fail_next -= 1
+
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if forced or (self.fault_rate and random.random() < self.fault_rate):
+            self._send(503)
+            return False
+        return True
+
+    def _authorized(self):
+        token = self.headers.get("Authentication")
+        if token is None or token != self.state.operator:
+            self._send(401)
+            return False
+        return True
+
+    # -----------------------------------------
+    # Endpoints
+    # -----------------------------------------
+    def do_GET(self):
+        path = self._path()
+        s = self.state
+        if not self._network():
+            return
+
+        if path == "/operator":
+            with s.lock:
+                op = s.operator
+            if op is None:
+                self._send(204)
+            else:
+                self._send(200, {"token": op})
+
+        elif path == "/tcp":
+            if self._authorized():
+                with s.lock:
+                    self._send(200, _nested(s.tcp()))
+
+        elif path == "/gripper":
+            if self._authorized():
+                with s.lock:
+                    self._send(200, s.gripper_value())
+
+        else:
+            self._send(404)
+
+    def do_POST(self):
+        self._body()
+        if self._path() != "/operator":
+            self._send(404)
+            return
+        if not self._network():
+            return
+
+        with self.state.lock:
+            if self.state.operator is not None:
+                self._send(409)
+                return
+            self.state.operator = uuid.uuid4().hex
+
+        self._send(200, headers={"Location": f"{PREFIX}/operator/{self.state.operator}"})
+
+    def do_DELETE(self):
+        path = self._path()
+        if not path.startswith("/operator/"):
+            self._send(404)
+            return
+        if not self._network():
+            return
+
+        with self.state.lock:
+            if path.split("/")[-1] == self.state.operator:
+                self.state.operator = None
+                code = 200
+            else:
+                code = 404
+        self._send(code)
+
+    def do_PUT(self):
+        path = self._path()
+        body = self._body()
+
+        if path not in ("/tcp/target", "/gripper", "/initialize"):
+            self._send(404)
+            return
+        if not self._network() or not self._authorized():
+            return
+
+        s = self.state
+        with s.lock:
+            if path == "/tcp/target":
+                s.set_target(_flat(body["target"]), body.get("speed"))
+            elif path == "/gripper":
+                s.set_gripper(body)
+            else:
+                s.set_target(_flat(HOME_TCP), 100)
+        self._send(200)
+
+
+def start_mock_server(host="127.0.0.1", port=0, instant=True, latency=0.0, jitter=0.0, fault_rate=0.0):
+    """
+    Starts the simulator on a background thread. Returns (server, base_url).
+    instant=True: moves finish immediately (plain mock); False: realistic timing.
+    server.state gives access to the simulated robot.
+    """
+    handler = type("MockHandler", (Handler,), {
+        "state": RobotState(instant),
+        "latency": latency,
+        "jitter": jitter,
+        "fault_rate": fault_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.state = handler.state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}{PREFIX}"
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Simulated cherrybot API")
+    p.add_argument("port", type=int, nargs="?", default=8080)
+    p.add_argument("--instant", action="store_true", help="moves finish immediately")
+    p.add_argument("--latency", type=float, default=0.0, help="s added to every request")
+    p.add_argument("--jitter", type=float, default=0.0, help="s of random extra latency")
+    p.add_argument("--fault-rate", type=float, default=0.0, help="share of requests that get a 503")
+    args = p.parse_args()
+
+    server, url = start_mock_server(port=args.port, instant=args.instant, latency=args.latency,
+                                    jitter=args.jitter, fault_rate=args.fault_rate)
+    print(f"🧪 Simulated cherrybot running at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,163 @@
+# ---------------------------------------------
+# object_detection.py — circle + black object detection of "import cv2.py"
+# Split into stages so the same code can be timed offline (bench_vision.py).
+# ---------------------------------------------
+import cv2
+import numpy as np
+
+import metrics
+
+FRAME_SIZE = (960, 540)
+
+# Generic circles (any size), not just cans
+CIRCLE_PARAMS = dict(dp=1.2, minDist=50, param1=100, param2=30, minRadius=15, maxRadius=150)
+
+# change_gate margin for this detector: the largest circle it returns fits in a crop
+REGION_MARGIN = 2 * CIRCLE_PARAMS["maxRadius"]
+
+# Black objects: dark in HSV, cleaned up with open + close
+BLACK_LOWER = np.array([0, 0, 0])
+BLACK_UPPER = np.array([180, 255, 70])
+MORPH_KERNEL = np.ones((7, 7), np.uint8)
+MIN_BLACK_AREA = 1000    # px, holes included (pixel count, ~half the perimeter above contourArea)
+
+# One float32 row per black object, all pixels
+BOX_COLUMNS = ("x", "y", "w", "h", "area", "cx", "cy")
+
+
+# -----------------------------------------
+# Circles
+# -----------------------------------------
+@metrics.timed("vision.preprocess")
+def preprocess(frame):
+    """BGR frame (already FRAME_SIZE) → median-blurred grayscale."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.medianBlur(gray, 7)
+
+
+@metrics.timed("vision.hough")
+def hough_circles(blur, params=CIRCLE_PARAMS):
+    """N×3 float32 array of (x, y, r)."""
+    circles = cv2.HoughCircles(blur, cv2.HOUGH_GRADIENT, **params)
+    if circles is None:
+        return np.empty((0, 3), dtype=np.float32)
+    return circles[0]
+
+
+# -----------------------------------------
+# Black objects
+# -----------------------------------------
+def black_threshold(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    return cv2.inRange(hsv, BLACK_LOWER, BLACK_UPPER)
+
+
+def clean_mask(mask):
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, MORPH_KERNEL)
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, MORPH_KERNEL)
+
+
+@metrics.timed("vision.black_mask")
+def black_mask(frame):
+    return clean_mask(black_threshold(frame))
+
+
+def no_boxes():
+    return np.empty((0, len(BOX_COLUMNS)), dtype=np.float32)
+
+
+def fill_holes(mask):
+    """Mask with every enclosed hole filled: the area inside each blob's outer contour."""
+    # background reachable from the border (4-connected, the dual of 8-connected blobs)
+    outside = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    cv2.floodFill(outside, None, (0, 0), 255)
+    return mask | ~outside[1:-1, 1:-1]
+
+
+def black_boxes(mask, min_area=MIN_BLACK_AREA):
+    """N×7 float32 array (BOX_COLUMNS) of every black blob of at least min_area pixels, holes included."""
+    # enclosed holes (e.g. glare spots) count, as they did with contourArea
+    mask = fill_holes(mask)
+    # boxes, pixel areas and centroids of all blobs in one pass, no per-contour calls;
+    # 16-bit labels + BBDT is the fastest variant here (the opened mask has far
+    # fewer than 65535 blobs)
+    n, _, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(mask, 8, cv2.CV_16U, cv2.CCL_BBDT)
+    boxes = np.hstack([stats[1:n], centroids[1:n]]).astype(np.float32)
+    return boxes[boxes[:, 4] >= min_area]
+
+
+def detect_black_objects(frame):
+    return black_boxes(black_mask(frame))
+
+
+def detect_objects(frame):
+    """Both detectors on one FRAME_SIZE frame → (circles, boxes). Used by the worker processes."""
+    return hough_circles(preprocess(frame)), detect_black_objects(frame)
+
+
+# -----------------------------------------
+# Partial re-detection (see change_gate)
+# An object belongs to a crop only if it lies entirely inside it; a crop
+# edge on the frame border does not cut anything. Objects across a crop
+# edge are kept from the previous result and not re-detected.
+# -----------------------------------------
+def circle_extents(circles):
+    x, y, r = circles[:, 0], circles[:, 1], circles[:, 2]
+    return np.column_stack([x - r, y - r, x + r, y + r])
+
+
+def box_extents(boxes):
+    x, y, w, h = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    return np.column_stack([x, y, x + w, y + h])
+
+
+def inside_crop(extents, region, shape=(FRAME_SIZE[1], FRAME_SIZE[0])):
+    """Mask of the (left, top, right, bottom) extents lying strictly inside the crop."""
+    x0, y0, x1, y1 = region
+    h, w = shape[:2]
+    left, top, right, bottom = extents.T
+    return (((left > x0) | (x0 == 0)) & ((top > y0) | (y0 == 0)) &
+            ((right < x1) | (x1 == w)) & ((bottom < y1) | (y1 == h)))
+
+
+def detect_objects_in(frame, regions):
+    """detect_objects on crops only, in frame coordinates; objects cut by a crop edge are dropped."""
+    circles, boxes = [np.empty((0, 3), np.float32)], [no_boxes()]
+    for region in regions:
+        x0, y0, x1, y1 = region
+        c, b = detect_objects(frame[y0:y1, x0:x1])
+        c[:, :2] += (x0, y0)
+        b[:, [0, 5]] += x0
+        b[:, [1, 6]] += y0
+        circles.append(c[inside_crop(circle_extents(c), region, frame.shape)])
+        boxes.append(b[inside_crop(box_extents(b), region, frame.shape)])
+    return np.concatenate(circles), np.concatenate(boxes)
+
+
+def merge_objects(previous, fresh, regions, shape=(FRAME_SIZE[1], FRAME_SIZE[0])):
+    """Previous detections not entirely inside a re-detected region + the fresh ones."""
+    circles, boxes = previous
+    replaced = np.zeros(len(circles), dtype=bool)
+    replaced_box = np.zeros(len(boxes), dtype=bool)
+    for region in regions:
+        replaced |= inside_crop(circle_extents(circles), region, shape)
+        replaced_box |= inside_crop(box_extents(boxes), region, shape)
+    return (np.concatenate([circles[~replaced], fresh[0]]),
+            np.concatenate([boxes[~replaced_box], fresh[1]]))
+
+
+# -----------------------------------------
+# Overlay
+# -----------------------------------------
+def draw(annotated, circles, boxes):
+    for x, y, r in np.uint16(np.around(circles)):
+        cv2.circle(annotated, (x, y), r, (0, 255, 0), 3)
+        cv2.circle(annotated, (x, y), 3, (0, 0, 255), -1)
+        cv2.putText(annotated, "circle", (x - 25, y - r - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+    for x, y, w, h in boxes[:, :4].astype(int):
+        cv2.rectangle(annotated, (x, y), (x + w, y + h), (255, 0, 0), 3)
+        cv2.putText(annotated, "black rectangle", (x, y - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+    return annotated
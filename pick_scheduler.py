@@ -0,0 +1,71 @@
+# ---------------------------------------------
+# pick_scheduler.py — choose which cans to pick, and in what order
+# Minimises XY travel: start → can → stack → can → stack → ...
+# ---------------------------------------------
+import heapq
+import itertools
+import math
+
+
+def default_slot_orders(n_slots):
+    """Bottom slots may be filled in any order, the top slot (last) always comes last."""
+    bottom = range(n_slots - 1)
+    return [order + (n_slots - 1,) for order in itertools.permutations(bottom)]
+
+
+def schedule_picks(cans, stack_positions, start, slot_orders=None):
+    """
+    cans:             [(x, y), ...] robot coords of all detections
+    stack_positions:  [(x, y), ...] tower slots, top slot last
+    start:            (x, y[, z]) pose the arm starts from
+
+    Returns (plan, travel) where plan is [(slot, can_index), ...] in pick order.
+
+    Exact: with the slot order fixed, every leg costs
+        |prev_stack - can| + |can - stack|
+    independently of the other legs, so it is an assignment problem. The best
+    assignment only ever uses one of each leg's k cheapest cans (k = number of
+    legs), so we only search those candidates.
+    """
+    n = min(len(cans), len(stack_positions))
+    if n == 0:
+        return [], 0.0
+
+    slots = stack_positions[:n]
+    if slot_orders is None:
+        slot_orders = default_slot_orders(n)
+
+    best_plan, best_cost = None, math.inf
+
+    for order in slot_orders:
+        prev = (start[0], start[1])
+        candidates = []
+        for slot in order:
+            sx, sy = slots[slot]
+            px, py = prev
+            costs = ((math.hypot(cx - px, cy - py) + math.hypot(sx - cx, sy - cy), i)
+                     for i, (cx, cy) in enumerate(cans))
+            candidates.append(heapq.nsmallest(n, costs))
+            prev = (sx, sy)
+
+        for combo in itertools.product(*candidates):
+            picked = [i for _, i in combo]
+            if len(set(picked)) < n:
+                continue
+
+            cost = sum(c for c, _ in combo)
+            if cost < best_cost:
+                best_cost = cost
+                best_plan = list(zip(order, picked))
+
+    return best_plan, best_cost
+
+
+def travel(plan, cans, stack_positions, start):
+    """XY travel of an explicit [(slot, can_index), ...] plan, for comparisons."""
+    total = 0.0
+    prev = (start[0], start[1])
+    for slot, i in plan:
+        total += math.dist(prev, cans[i]) + math.dist(cans[i], stack_positions[slot])
+        prev = stack_positions[slot]
+    return total
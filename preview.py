@@ -0,0 +1,88 @@
+# ---------------------------------------------
+# preview.py — optional debug overlay and rate-limited logging
+# Headless (CANSTACKER_HEADLESS=1): no window, no frame copies, no drawing.
+# Otherwise the overlay is only built for every PREVIEW_EVERY-th frame.
+# PREVIEW_FILE (CANSTACKER_PREVIEW=path.jpg) additionally keeps a small
+# JPEG of the latest overlay on disk, e.g. to look at a headless box.
+# ---------------------------------------------
+import os
+import time
+
+import cv2
+
+from atomic_file import atomic_write
+
+HEADLESS = os.environ.get("CANSTACKER_HEADLESS", "0") == "1"
+PREVIEW_EVERY = 5        # frames between overlay updates
+PREVIEW_FILE = os.environ.get("CANSTACKER_PREVIEW") or None
+PREVIEW_SCALE = 0.5      # size of the JPEG snapshot
+LOG_INTERVAL = 2.0       # s between status summaries
+
+
+class Preview:
+    """
+    preview = Preview("Detector")
+    if preview.due():
+        if preview.show(draw(frame.copy(), ...)) == ord("q"):
+            break
+    """
+
+    def __init__(self, window, every=PREVIEW_EVERY, headless=HEADLESS, path=PREVIEW_FILE):
+        self.window = window
+        self.every = max(int(every), 1)
+        self.headless = headless
+        self.path = path
+        self.frames = 0
+        self.shown = False     # window exists (destroying one that does not raises)
+
+    @property
+    def enabled(self):
+        return not self.headless or self.path is not None
+
+    def due(self):
+        """True if this frame should be drawn. Call once per frame."""
+        self.frames += 1
+        return self.enabled and (self.frames - 1) % self.every == 0
+
+    def show(self, image, wait=1):
+        """Shows / saves the overlay. Returns the pressed key, -1 if none (always -1 headless)."""
+        if self.path is not None:
+            self._save(image)
+        if self.headless:
+            return -1
+        cv2.imshow(self.window, image)
+        self.shown = True
+        return cv2.waitKey(wait) & 0xFF
+
+    def _save(self, image):
+        small = cv2.resize(image, None, fx=PREVIEW_SCALE, fy=PREVIEW_SCALE, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", small)
+        if ok:
+            with atomic_write(self.path, "wb") as f:   # viewers never see a half-written file
+                f.write(jpeg.tobytes())
+
+    def close(self):
+        if self.shown:
+            cv2.destroyWindow(self.window)
+            self.shown = False
+
+
+class StatusLog:
+    """Prints at most one summary every `interval` seconds instead of a line per detection."""
+
+    def __init__(self, interval=LOG_INTERVAL):
+        self.interval = interval
+        self.last = time.monotonic()
+        self.frames = 0
+
+    def tick(self):
+        """Counts a frame. Returns the frame rate since the last summary if one is due, else None."""
+        self.frames += 1
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return None
+
+        fps = self.frames / (now - self.last)
+        self.last = now
+        self.frames = 0
+        return fps
@@ -1,10 +1,17 @@
-import requests
+import asyncio
 import time
 import math
-from coord_transform import camera_to_robot   # NEW: uses full homography
+import metrics
+from coord_transform import camera_to_robot_batch   # NEW: uses full homography
+from cherrybot_client import CherrybotClient
+from detection_channel import DetectionSubscriber
+from gripper import GraspError, Gripper
+from robot_pipeline import CommandExecutor
+from trajectory import BLEND_RADIUS, Job, Waypoint, plan_stack
+from pick_scheduler import schedule_picks
 
 bot = "cherrybot"
-DETECTION_FILE = "detected_coords.txt"
+client = CherrybotClient()
 
 # -----------------------------------------------------------
 # STACK POSITION SETTINGS (BOTTOM, BOTTOM, TOP)
@@ -22,6 +29,22 @@ Z_PICK = 200
 Z_LIFT = 300
 Z_TOP = Z_PICK + CANHIGHT     # slightly higher so top can doesn't crash
 
+# Start / home pose above the workspace
+HOME = (0, -450, 300)
+
+# Service mode: towers are built at these sites in turn (position of the
+# bottom-left can; the other slots keep their STACK_POSITIONS offsets)
+STACK_SITES = [
+    (0,    -400),
+    (150,  -400),
+    (-150, -400)
+]
+SITE_CLEARANCE = 60    # mm, a can this close to a slot stands on it
+RECHECK_GATE = 30      # mm, a can must be within this of where we expect it
+RECHECK_MOVED = 3      # mm, re-aim if the can moved more than this
+RECHECK_TIMEOUT = 2.0  # s, wait this long for a frame taken above the can
+DETECTION_EXPIRY = 1.0 # s, until a picked can has dropped out of the live detections
+
 CONFIG_POSITIONS = [
     (0,   -400),
     (100,  -400),
@@ -32,43 +55,73 @@ CONFIG_POSITIONS = [
 # Z heights for config mode
 Z_CONFIG_LIFT = 300
 Z_CONFIG_PLACE = 200
+
+# Automatic camera calibration: one can is set down on every grid point
+CALIBRATION_GRID_X = (0, 50, 100)
+CALIBRATION_GRID_Y = (-400, -350, -300)
+CALIBRATION_PARK = (-200, -450, 300)   # arm waits here, out of the camera's view
+CALIBRATION_FRAMES = 60                # frames averaged per grid point
+
+# Motion completion
+ARRIVAL_TOLERANCE = 2.0   # mm, TCP distance that counts as "arrived"
+ARRIVAL_TIMEOUT = 15.0    # s, give up waiting after this long
+ARRIVAL_POLL = 0.2        # s, pause between TCP polls
+GRIPPER_SETTLE = 1.0      # s, time for the fingers to close / open
+
+# Gripper (open / close values live in gripper.py)
+GRASP_CHECK = False       # read the gripper after each grab; only if the API reports the finger position
+
 # -----------------------------------------------------------
-# READ ALL DETECTED CANS FROM FILE
+# READ ALL DETECTED CANS (detection channel)
 # -----------------------------------------------------------
 def read_all_detections():
     print("📄 Waiting for detected cans...")
 
-    while True:
-        try:
-            with open(DETECTION_FILE, "r") as f:
-                lines = [l.strip() for l in f.readlines() if l.strip()]
-
-            if len(lines) == 0:
-                continue
-
-            cans_px = []
-            for line in lines:
-                parts = line.split()
-                if len(parts) >= 2:
-                    u, v = map(float, parts[:2])
-                    cans_px.append((u, v))
+    with DetectionSubscriber() as sub:
+        newer_than = 0.0
+        while True:
+            msg = sub.wait(newer_than=newer_than)
+            cans_px = [(c["u"], c["v"]) for c in msg["cans"]]
 
             if len(cans_px) >= 1:
-                print(f"📥 Found {len(cans_px)} detections.")
+                age = time.time() - msg["captured_at"]
+                print(f"📥 Found {len(cans_px)} detections ({age:.1f}s old).")
                 return cans_px
 
-        except FileNotFoundError:
-            pass
-
-        time.sleep(0.1)
+            # empty message: wait for the next one
+            newer_than = msg["timestamp"]
 
 
 # -----------------------------------------------------------
 # MOVEMENT FUNCTIONS
 # -----------------------------------------------------------
-def move_to_absolute(x, y, z, roll=180, pitch=0, yaw=180):
+def move_to_absolute(x, y, z, roll=180, pitch=0, yaw=180, wait=True):
     print(f"🧭 Moving to: x={x}, y={y}, z={z}")
     put_tcp_target(x, y, z, roll, pitch, yaw)
+    if wait:
+        wait_until_arrived(x, y, z)
+
+
+class MotionTimeout(RuntimeError):
+    """The TCP did not reach a waypoint within ARRIVAL_TIMEOUT."""
+
+
+def wait_until_arrived(x, y, z, tolerance=ARRIVAL_TOLERANCE, timeout=ARRIVAL_TIMEOUT):
+    """Polls the TCP until it is within `tolerance` mm of (x, y, z). Returns True on arrival."""
+    deadline = time.monotonic() + timeout
+
+    while True:
+        coords = get_tcp_target()
+        if coords:
+            dist = math.dist(coords[:3], (x, y, z))
+            if dist <= tolerance:
+                return True
+
+        if time.monotonic() >= deadline:
+            print(f"⚠️ TCP did not reach x={x}, y={y}, z={z} within {timeout:.0f}s.")
+            return False
+
+        time.sleep(ARRIVAL_POLL)
 
 
 def rotate(angle):
@@ -85,63 +138,119 @@ def rotate(angle):
     yaw_new = yaw - angle
 
     put_tcp_target(x_new, y_new, z, roll, pitch, yaw_new)
+    wait_until_arrived(x_new, y_new, z)
     print(f"🔄 Rotated {angle}°")
 
 
 # -----------------------------------------------------------
 # GRIPPER
 # -----------------------------------------------------------
+gripper = Gripper(client, confirm=GRASP_CHECK)
+
+
 def toggle():
-    g = get_gripper()
-    if g == 630:
-        print("🤏 Closing gripper")
-        put_gripper(800)
-    else:
-        print("👐 Opening gripper")
-        put_gripper(630)
+    # cached state: no GET /gripper unless it is unknown or stale
+    gripper.toggle()
 
 
 # -----------------------------------------------------------
 # PICK AND PLACE ONE CAN
 # -----------------------------------------------------------
-def pick_and_place_can(i, x_robot, y_robot, x_stack, y_stack):
-    print(f"\n🔵 PICK CAN {i} at: x={x_robot:.1f}, y={y_robot:.1f}")
-
-    # Move above can
-    move_to_absolute(x_robot, y_robot, Z_LIFT)
-    time.sleep(5)
-
-    # Lower to pick height
-    move_to_absolute(x_robot, y_robot, Z_PICK)
-    time.sleep(5)
+def site_positions(site):
+    """STACK_POSITIONS moved so that slot 0 sits at `site`."""
+    x0, y0 = STACK_POSITIONS[0]
+    return [(site[0] + x - x0, site[1] + y - y0) for x, y in STACK_POSITIONS]
+
+
+def stack_job(i, x_robot, y_robot, site=None):
+    """Job for the i-th can of the tower; the third can goes on top."""
+    positions = STACK_POSITIONS if site is None else site_positions(site)
+    x_stack, y_stack = positions[i]
+    z_place = Z_TOP if i == 2 else Z_PICK
+    return Job(x_robot, y_robot, Z_PICK, x_stack, y_stack, z_place)
+
+
+def run_waypoint(wp):
+    print(f"🧭 {wp.label}: x={wp.x:.1f}, y={wp.y:.1f}, z={wp.z:.1f}")
+    phase = "motion." + wp.label.replace(" ", "_")
+    with metrics.timer(phase):
+        put_tcp_target(wp.x, wp.y, wp.z, 180, 0, 180)
+
+        # Via points only need to be passed, stop points need full arrival
+        tolerance = ARRIVAL_TOLERANCE if wp.stop else BLEND_RADIUS
+        with metrics.timer("motion.wait_arrived"):
+            arrived = wait_until_arrived(wp.x, wp.y, wp.z, tolerance=tolerance)
+        if not arrived:
+            # never grab or release at a pose we did not reach
+            raise MotionTimeout(f"{wp.label} not reached at x={wp.x:.1f}, y={wp.y:.1f}, z={wp.z:.1f}")
+
+        if wp.gripper == "close":
+            print("🤏 Closing gripper")
+            if not gripper.close():
+                raise GraspError(f"close command rejected at x={wp.x:.1f}, y={wp.y:.1f}")
+            with metrics.timer("motion.gripper_settle"):
+                time.sleep(GRIPPER_SETTLE)
+            if gripper.holding() is False:
+                raise GraspError(f"nothing in the gripper at x={wp.x:.1f}, y={wp.y:.1f}")
+        elif wp.gripper == "open":
+            print("👐 Opening gripper")
+            if not gripper.open():
+                raise GraspError(f"open command rejected at x={wp.x:.1f}, y={wp.y:.1f}")
+            with metrics.timer("motion.gripper_settle"):
+                time.sleep(GRIPPER_SETTLE)
+
+
+def recover_grasp(wp, error):
+    """After a failed grab (GRASP_CHECK) or a missed waypoint: open again and back off above the can."""
+    print(f"⚠️ Pick failed ({error}), skipping this can.")
+    gripper.open()
+    move_to_absolute(wp.x, wp.y, Z_LIFT)
+
+
+def _per_can(waypoints):
+    """Waypoints split per can, each group starting at its "above can"."""
+    groups = []
+    for wp in waypoints:
+        if wp.label == "above can" or not groups:
+            groups.append([])
+        groups[-1].append(wp)
+    return groups
+
+
+def run_plan(plan, skipped=0):
+    """
+    Runs the waypoints. A failed grasp or a waypoint not reached in time is
+    recovered and that can skipped; once a can is missing the top can is
+    skipped too, it would have nothing to stand on.
+    Returns the number of skipped cans, counting `skipped` from earlier plans.
+    """
+    for group in _per_can(plan.waypoints):
+        release = next((wp for wp in group if wp.gripper == "open"), None)
+        if skipped and release is not None and release.z > Z_PICK:
+            print("⚠️ Skipping the top can, the tower is missing a can below it.")
+            skipped += 1
+            continue
+
+        for wp in group:
+            try:
+                run_waypoint(wp)
+            except (GraspError, MotionTimeout) as e:
+                recover_grasp(wp, e)
+                skipped += 1
+                break
+    return skipped
 
-    # Grab
-    toggle()
-    time.sleep(1)
 
-    # Lift upwards
-    move_to_absolute(x_robot, y_robot, Z_LIFT)
-    time.sleep(10)
-
-    # Move above stack position
-    print(f"🟢 PLACE CAN {i} at: x={x_stack:.1f}, y={y_stack:.1f}")
-    move_to_absolute(x_stack, y_stack, Z_LIFT)
-    time.sleep(10)
-
-    # Lower to stacking height
-    if i == 2:
-        move_to_absolute(x_stack, y_stack, Z_TOP)
-    else:
-        move_to_absolute(x_stack, y_stack, Z_PICK)
-    time.sleep(10)
-
-    # Release
-    toggle()
-    time.sleep(1)
+def pick_and_place_can(i, x_robot, y_robot, x_stack, y_stack):
+    print(f"\n🔵 PICK CAN {i} at: x={x_robot:.1f}, y={y_robot:.1f} "
+          f"→ PLACE at: x={x_stack:.1f}, y={y_stack:.1f}")
 
-    # Lift away
-    move_to_absolute(x_stack, y_stack, Z_LIFT)
-    time.sleep(6)
+    z_place = Z_TOP if i == 2 else Z_PICK
+    job = Job(x_robot, y_robot, Z_PICK, x_stack, y_stack, z_place)
+    with metrics.timer("motion.pick_and_place"):
+        coords = get_tcp_target()
+        start = coords[:3] if coords else HOME
+        return run_plan(plan_stack([job], start, Z_LIFT)) == 0
 
 
 # -----------------------------------------------------------
@@ -156,6 +265,7 @@ def log_on():
     email = ".@student.unisg.ch"
     new_tok, code = post_operator(name, email)
     initialize()
+    gripper.sync()   # start from the real state, later toggles use the cache
 
     if code == 200:
         print(f"Connected to {bot}")
@@ -163,7 +273,8 @@ def log_on():
 
 
 def log_off():
-    delete_operator(token)
+    if client.token:
+        delete_operator(client.token)
     print("Logged off.")
 
 def config_mode():
@@ -171,208 +282,438 @@ def config_mode():
     print("Place 4 cans into the robot's gripper when prompted.\n")
 
     rotate(45)
-    time.sleep(6)
-
     rotate(45)
-    time.sleep(6)
 
-    move_to_absolute(0, -450, 300)
-    time.sleep(10)
+    move_to_absolute(*HOME)
 
     for i, (x, y) in enumerate(CONFIG_POSITIONS):
         print(f"\n📍 Preparing position {i+1}: x={x}, y={y}")
 
         # Move above target
         move_to_absolute(x, y, Z_CONFIG_LIFT)
-        time.sleep(5)
 
         # Lower to place height
         move_to_absolute(x, y, Z_CONFIG_PLACE)
-        time.sleep(5)
 
         # OPEN gripper so you can place a can
         print("🤲 Please place a can into the gripper now.")
-        toggle()  # open
+        gripper.open()
         time.sleep(4)
 
         # CLOSE to hold the can
-        toggle()  # close
-        time.sleep(3)
+        gripper.close()
+        time.sleep(GRIPPER_SETTLE)
 
         # Lift away
         move_to_absolute(x, y, Z_CONFIG_LIFT)
-        time.sleep(5)
 
         print(f"✔️ Can {i+1} placed at config position.")
 
     print("\n🎉 CONFIGURATION COMPLETE — 4 CANS ARE PLACED.\n")
 
+# -----------------------------------------------------------
+# AUTOMATIC CAMERA CALIBRATION
+# -----------------------------------------------------------
+def calibrate_mode():
+    # cv2 is only needed here, keep it out of the normal start-up
+    from can_detection import measure_can
+    from coord_transform import fit_homography, robot_to_camera_batch, save_calibration
+    from frame_source import CAMERA_SOURCE, FrameSource
+    from undistort import intrinsics_id
+
+    grid = [(x, y) for y in CALIBRATION_GRID_Y for x in CALIBRATION_GRID_X]
+    print(f"\n📐 CAMERA CALIBRATION — {len(grid)} grid points")
+
+    source = FrameSource(CAMERA_SOURCE).start()
+    if not source.opened:
+        print("❌ Could not open camera.")
+        return
+
+    # Current calibration predicts where to look; a bumped camera is still close enough
+    expected = robot_to_camera_batch(grid)
+
+    move_to_absolute(*HOME)
+    print("🤲 Please place ONE can into the gripper now.")
+    gripper.open()
+    time.sleep(4)
+    gripper.close()
+    time.sleep(GRIPPER_SETTLE)
+
+    src, dst = [], []
+    for i, (x, y) in enumerate(grid):
+        print(f"\n📍 Grid point {i+1}/{len(grid)}: x={x}, y={y}")
+
+        # Set the can down and get out of the picture
+        move_to_absolute(x, y, Z_CONFIG_LIFT)
+        move_to_absolute(x, y, Z_CONFIG_PLACE)
+        gripper.open()
+        time.sleep(GRIPPER_SETTLE)
+        move_to_absolute(x, y, Z_CONFIG_LIFT)
+        move_to_absolute(*CALIBRATION_PARK)
+
+        px = measure_can(source, CALIBRATION_FRAMES, expected=expected[i])
+        if px is None:
+            px = measure_can(source, CALIBRATION_FRAMES)   # far off? take any lone can
+        if px is None:
+            print("⚠️ Can not found, skipping this point.")
+        else:
+            print(f"📷 Seen at u={px[0]:.1f}, v={px[1]:.1f}")
+            src.append(px)
+            dst.append((x, y))
+
+        # Pick it up again for the next point
+        move_to_absolute(x, y, Z_CONFIG_LIFT)
+        move_to_absolute(x, y, Z_CONFIG_PLACE)
+        gripper.close()
+        time.sleep(GRIPPER_SETTLE)
+        move_to_absolute(x, y, Z_CONFIG_LIFT)
+
+    source.stop()
+
+    if len(src) < 4:
+        print(f"❌ Only {len(src)} points measured, need at least 4. Calibration unchanged.")
+        return
+
+    H, inliers = fit_homography(src, dst)
+    src = [p for p, ok in zip(src, inliers) if ok]
+    dst = [p for p, ok in zip(dst, inliers) if ok]
+    calib = save_calibration(H, src, dst, method="auto")
+
+    lens = "on" if intrinsics_id() else "off (no intrinsics.json)"
+    print(f"\n🎉 CALIBRATION SAVED — {len(src)}/{len(grid)} points, "
+          f"reprojection error {calib['reprojection_error_mm']:.2f} mm, lens correction {lens}\n")
+
+
 # -----------------------------------------------------------
 # MAIN AUTO STACK SEQUENCE
 # -----------------------------------------------------------
+def plan_tower(detections_px):
+    """Transforms the detections and picks the cans / order with the least travel from HOME."""
+    detections_robot = [tuple(p) for p in camera_to_robot_batch(detections_px).tolist()]
+
+    print("\n📌 DETECTIONS (robot coords):")
+    for d in detections_robot:
+        print(f"   x={d[0]:.1f}, y={d[1]:.1f}")
+
+    picks, travel_mm = schedule_picks(detections_robot, STACK_POSITIONS, HOME)
+    jobs = [stack_job(slot, *detections_robot[i]) for slot, i in picks]
+
+    order = ", ".join(f"det {i} → slot {slot}" for slot, i in picks)
+    print(f"\n🗺️ Pick order: {order} ({travel_mm:.0f} mm XY travel)")
+    return jobs
+
+
 def auto_stack():
     print("\n🤖 STARTING AUTO STACKING...\n")
 
     rotate(45)
-    time.sleep(6)
-
     rotate(45)
-    time.sleep(6)
 
-    move_to_absolute(0, -450, 300)
-    time.sleep(10)
+    move_to_absolute(*HOME)
 
     # Read all detected cans from file
     detections_px = read_all_detections()
+    jobs = plan_tower(detections_px)
 
-    # Convert to robot coordinates
-    detections_robot = [camera_to_robot(u, v) for (u, v) in detections_px]
+    # Pick & stack the tower as one planned path
+    plan = plan_stack(jobs, HOME, Z_LIFT)
+    unmerged = plan_stack(jobs, HOME, Z_LIFT, merge_lifts=False)
+    print(f"\n📐 Plan: {plan.summary()} (unmerged: {unmerged.summary()})")
 
-# KEEP FILE ORDER → no sorting
-# detections_robot.sort(key=lambda p: p[0])
+    skipped = run_plan(plan)
+    report_tower(skipped)
 
-    print("\n📌 DETECTIONS (robot coords, file order):")
-    for d in detections_robot:
-        print(f"   x={d[0]:.1f}, y={d[1]:.1f}")
 
-    # Pick & stack the first 3 cans
-    for i, (x_r, y_r) in enumerate(detections_robot[:3]):
-        x_stack, y_stack = STACK_POSITIONS[i]
-        pick_and_place_can(i, x_r, y_r, x_stack, y_stack)
+def report_tower(skipped):
+    if skipped:
+        print(f"\n⚠️ STACKING STOPPED SHORT — {skipped} can(s) skipped after failed picks.\n")
+    else:
+        print("\n🎉 STACKING COMPLETE! A 3-CAN TOWER WAS BUILT.\n")
 
-    print("\n🎉 STACKING COMPLETE! A 3-CAN TOWER WAS BUILT.\n")
+
+# -----------------------------------------------------------
+# PIPELINED AUTO STACK (vision overlapped with motion)
+# -----------------------------------------------------------
+async def auto_stack_async():
+    """
+    Detection, transform and scheduling run while the arm homes; then every
+    can's plan is queued at once, so each one is waiting on the executor
+    while the previous can is still being stacked.
+    """
+    print("\n🤖 STARTING PIPELINED AUTO STACKING...\n")
+
+    skipped = 0
+
+    def run_can(plan):
+        # one command per can, so a failed grasp is recovered inside it
+        # instead of aborting the queue; commands run in order, one at a time
+        nonlocal skipped
+        skipped = run_plan(plan, skipped)
+
+    async with CommandExecutor() as robot:
+        # Arm homes while we wait for the detector, transform and schedule
+        commands = [
+            robot.submit(rotate, 45),
+            robot.submit(rotate, 45),
+            robot.submit(move_to_absolute, *HOME),
+        ]
+        try:
+            detections_px = await robot.offload(read_all_detections)
+            jobs = await robot.offload(plan_tower, detections_px)
+
+            start = HOME
+            for k, job in enumerate(jobs):
+                plan = plan_stack([job], start, Z_LIFT, more_jobs=k + 1 < len(jobs))
+                commands.append(robot.submit(run_can, plan))
+                start = plan.waypoints[-1][:3]
+        except BaseException:
+            await asyncio.gather(*commands, return_exceptions=True)
+            raise
+
+        # every future is awaited, so a failed command is raised, never just logged
+        await asyncio.gather(*commands)
+
+    report_tower(skipped)
 
 
 # -----------------------------------------------------------
-# API COMMUNICATION (UNCHANGED)
+# CONTINUOUS SERVICE MODE (stack while scanning for new cans)
 # -----------------------------------------------------------
-def get_operator():
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/operator"
-    response = requests.get(url)
-    time.sleep(1)
+def free_cans(msg, filled=()):
+    """Robot coords of the cans in a detection message, minus the cans already stacked on `filled` slots."""
+    if not msg or not msg["cans"]:
+        return []
+
+    cans = camera_to_robot_batch([(c["u"], c["v"]) for c in msg["cans"]]).tolist()
+    return [tuple(c) for c in cans
+            if all(math.dist(c, s) > SITE_CLEARANCE for s in filled)]
+
+
+def next_pick(cans, slots, remaining, pose):
+    """
+    (slot, can index) of the next pick for the tower on `slots`, or None when the site is blocked.
+    A can standing on an empty slot is an obstacle: it is cleared first, into a
+    slot no other can stands on (the top slot still comes last).
+    """
+    empty = [slots[i] for i in remaining]
+    blockers = [j for j, c in enumerate(cans) if any(math.dist(c, s) <= SITE_CLEARANCE for s in empty)]
+    if not blockers:
+        picks, _ = schedule_picks(cans, empty, pose)
+        k, can = picks[0]
+        return remaining[k], can
+
+    top = len(slots) - 1
+    best, best_cost = None, math.inf
+    for j in blockers:
+        for i in remaining:
+            if i == top and len(remaining) > 1:
+                continue
+            if any(math.dist(c, slots[i]) <= SITE_CLEARANCE for k, c in enumerate(cans) if k != j):
+                continue
+            cost = math.dist(pose[:2], cans[j]) + math.dist(cans[j], slots[i])
+            if cost < best_cost:
+                best, best_cost = (i, j), cost
+    return best
 
-    if response.status_code == 200:
-        data = response.json()
-        return data["token"], 200
-    return None, response.status_code
 
+def fresh_detections(sub, since, timeout=RECHECK_TIMEOUT):
+    """First detection message from a frame captured after `since` (time.time()), or None on timeout."""
+    deadline = time.monotonic() + timeout
+    newer_than = since
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        msg = sub.wait(newer_than=newer_than, timeout=remaining)
+        if msg is None or msg["captured_at"] > since:
+            return msg
+        newer_than = msg["timestamp"]
+
+
+def locate_can(msg, x, y, filled=()):
+    """Position of the can expected at (x, y) in `msg`, or None if it is gone."""
+    cans = free_cans(msg, filled)
+    if not cans:
+        return None
+    best = min(cans, key=lambda c: math.dist(c, (x, y)))
+    return best if math.dist(best, (x, y)) <= RECHECK_GATE else None
+
+
+def pick_with_recheck(job, sub, filled=()):
+    """Flies above the can, checks it is still there, then picks and places it. Returns the end pose or None."""
+    above = (job.x_can, job.y_can, Z_LIFT)
+    run_waypoint(Waypoint(*above, True, None, "above can"))
+
+    # only a frame taken after the arm got here says anything about the can now
+    msg = fresh_detections(sub, since=time.time())
+    if msg is None:
+        print("⚠️ No fresh detections, skipping this pick.")
+        return None
+    fresh = locate_can(msg, job.x_can, job.y_can, filled)
+    if fresh is None:
+        print("⚠️ Can is gone, skipping it.")
+        return None
+    if math.dist(fresh, (job.x_can, job.y_can)) > RECHECK_MOVED:
+        print(f"↪️ Can moved to x={fresh[0]:.1f}, y={fresh[1]:.1f}, re-aiming.")
+        job = job._replace(x_can=fresh[0], y_can=fresh[1])
+
+    plan = plan_stack([job], above, Z_LIFT, more_jobs=True)
+    if run_plan(plan):
+        return None   # failed grasp: the can is seen again on the next scan
+    return plan.waypoints[-1][:3]
+
+
+def auto_service():
+    print("\n🏭 SERVICE MODE — stacking continuously (Ctrl+C to stop)\n")
 
-def post_operator(name, email):
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/operator"
-    response = requests.post(url, json={"name": name, "email": email})
-    time.sleep(1)
+    rotate(45)
+    rotate(45)
+    move_to_absolute(*HOME)
+
+    towers = 0
+    t_start = time.monotonic()
+    pose = HOME
+
+    try:
+        with DetectionSubscriber() as sub:
+            last_seen = 0.0
+            filled = []    # slots that hold a can, over all towers
 
-    if response.status_code == 200:
-        global token
-        token = response.headers["Location"].split("/")[-1]
-        return token, 200
-    return 0, response.status_code
+            for site in STACK_SITES:
+                slots = site_positions(site)
+                remaining = list(range(len(slots)))
+                print(f"\n🏗️ Building tower at x={site[0]}, y={site[1]}")
+
+                while remaining:
+                    msg = sub.wait(newer_than=last_seen, timeout=1.0)
+                    if msg is None:
+                        continue
+                    last_seen = msg["timestamp"]
+
+                    cans = free_cans(msg, filled)
+                    if not cans:
+                        continue
+
+                    # Re-plan with the current scene, execute only the next pick
+                    pick = next_pick(cans, slots, remaining, pose)
+                    if pick is None:
+                        print("🚧 Cans are standing on this site and cannot be cleared, skipping it.")
+                        break
+                    slot, can = pick
+
+                    end = pick_with_recheck(stack_job(slot, *cans[can], site=site), sub, filled)
+
+                    # Only trust detections made after the picked can has left the scene
+                    last_seen = time.time() + DETECTION_EXPIRY
+                    if end is None:
+                        continue
+                    pose = end
+                    remaining.remove(slot)
+                    filled.append(slots[slot])
+
+                if remaining:
+                    continue
+                towers += 1
+                hours = (time.monotonic() - t_start) / 3600
+                print(f"\n🎉 Tower {towers} done — {towers / hours:.1f} towers/hour")
+
+            print("\n🛑 All stack sites are full.")
+
+    except KeyboardInterrupt:
+        print("\n🛑 Service mode stopped.")
+
+    hours = (time.monotonic() - t_start) / 3600
+    print(f"📊 {towers} towers in {hours * 60:.1f} min → {towers / hours if hours else 0:.1f} towers/hour\n")
+    move_to_absolute(*HOME)
+
+
+# -----------------------------------------------------------
+# API COMMUNICATION (pooled session, see cherrybot_client.py)
+# -----------------------------------------------------------
+def get_operator():
+    return client.get_operator()
+
+
+def post_operator(name, email):
+    return client.post_operator(name, email)
 
 
 def delete_operator(token_delete):
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/operator/" + token_delete
-    requests.delete(url)
-    time.sleep(1)
+    client.delete_operator(token_delete)
 
 
 def get_tcp_target():
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/tcp"
-    headers = {"Authentication": token}
-    response = requests.get(url, headers=headers)
-    time.sleep(1)
-
-    if response.status_code == 200:
-        d = response.json()
-        return (
-            d["coordinate"]["x"],
-            d["coordinate"]["y"],
-            d["coordinate"]["z"],
-            d["rotation"]["roll"],
-            d["rotation"]["pitch"],
-            d["rotation"]["yaw"],
-        )
-    return None
+    return client.get_tcp()
 
 
 def put_tcp_target(x, y, z, roll, pitch, yaw):
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/tcp/target"
-    headers = {"Authentication": token}
-
-    data = {
-        "target": {
-            "coordinate": {"x": x, "y": y, "z": z},
-            "rotation": {"roll": roll, "pitch": pitch, "yaw": yaw},
-        },
-        "speed": 200
-    }
-
-    print(f"📡 Sending move: {data}")
-    response = requests.put(url, headers=headers, json=data)
-    print(f"➡️ Response: {response.status_code}")
-    time.sleep(1)
+    print(f"📡 Sending move: x={x}, y={y}, z={z}, roll={roll}, pitch={pitch}, yaw={yaw}")
+    code = client.put_tcp_target(x, y, z, roll, pitch, yaw)
+    print(f"➡️ Response: {code}")
 
 
 def put_gripper(param):
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/gripper"
-    headers = {"Authentication": token}
-    requests.put(url, headers=headers, json=param)
-    time.sleep(1)
+    client.put_gripper(param)
 
 
 def get_gripper():
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/gripper"
-    headers = {"Authentication": token}
-    r = requests.get(url, headers=headers)
-    time.sleep(1)
-
-    if r.status_code == 200:
-        return r.json()
-    return None
+    return client.get_gripper()
 
 
 def initialize():
-    url = f"https://api.interactions.ics.unisg.ch/{bot}/initialize"
-    headers = {"Authentication": token}
-    requests.put(url, headers=headers)
-    time.sleep(1)
+    client.initialize()
 
 
 # -----------------------------------------------------------
 # COMMAND INTERFACE
 # -----------------------------------------------------------
-print("Commands:\nconnect\nconfig\nauto\nmove_to x y z\nrotate deg\ntoggle\nget_tcp\nlog_off\nexit")
+if __name__ == "__main__":
+    print("Commands:\nconnect\nconfig\ncalibrate\nauto\nauto_async\nservice\nmove_to x y z\nrotate deg\ntoggle\nget_tcp\nmetrics\nlog_off\nexit")
+    metrics.start_exporter()   # only with CANSTACKER_METRICS=1
 
-while True:
-    cmd = input("\nCommand: ").lower().strip()
-    parts = cmd.split()
+    while True:
+        cmd = input("\nCommand: ").lower().strip()
+        parts = cmd.split()
 
-    if cmd == "connect":
-        token = log_on()
+        if cmd == "connect":
+            log_on()
 
-    elif cmd == "config":
-        config_mode()
+        elif cmd == "config":
+            config_mode()
 
-    elif cmd == "auto":
-        auto_stack()
+        elif cmd == "calibrate":
+            calibrate_mode()
 
-    elif parts[0] == "move_to":
-        move_to_absolute(float(parts[1]), float(parts[2]), float(parts[3]))
+        elif cmd == "auto":
+            auto_stack()
 
-    elif parts[0] == "rotate":
-        rotate(float(parts[1]))
+        elif cmd == "auto_async":
+            asyncio.run(auto_stack_async())
 
-    elif cmd == "toggle":
-        toggle()
+        elif cmd == "service":
+            auto_service()
 
-    elif cmd == "get_tcp":
-        print(get_tcp_target())
+        elif parts[0] == "move_to":
+            move_to_absolute(float(parts[1]), float(parts[2]), float(parts[3]))
 
-    elif cmd == "log_off":
-        log_off()
+        elif parts[0] == "rotate":
+            rotate(float(parts[1]))
 
-    elif cmd == "exit":
-        log_off()
-        exit()
+        elif cmd == "toggle":
+            toggle()
 
-    else:
-        print("Unknown command.")
\ No newline at end of file
+        elif cmd == "get_tcp":
+            print(get_tcp_target())
+
+        elif cmd == "metrics":
+            print(metrics.summary())
+
+        elif cmd == "log_off":
+            log_off()
+
+        elif cmd == "exit":
+            log_off()
+            exit()
+
+        else:
+            print("Unknown command.")
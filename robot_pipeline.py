@@ -0,0 +1,69 @@
+# ---------------------------------------------
+# robot_pipeline.py — asyncio command queue for the robot
+# Motion / gripper commands run one at a time, in order, on a worker
+# thread, while the event loop stays free for perception work.
+# ---------------------------------------------
+import asyncio
+
+
+class CommandAborted(RuntimeError):
+    """Raised for queued commands that were dropped because an earlier one failed."""
+
+
+class CommandExecutor:
+    """
+    async with CommandExecutor() as robot:
+        done = robot.submit(move_to_absolute, x, y, z)   # returns an awaitable future
+        cans = await robot.offload(read_all_detections)  # runs beside the motion
+        await done
+    """
+
+    def __init__(self):
+        self.queue = None
+        self.worker = None
+        self.error = None
+
+    async def __aenter__(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.error = self.error or exc
+        await self.queue.join()
+        self.worker.cancel()
+        return False
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs). The future resolves when the command has finished."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((future, fn, args, kwargs))
+        return future
+
+    def offload(self, fn, *args, **kwargs):
+        """Starts a non-robot job (detection, transforms) on its own thread, beside the queue."""
+        return asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+
+    async def _run(self):
+        while True:
+            future, fn, args, kwargs = await self.queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                if self.error is not None:
+                    # Never keep driving the arm after a failed step
+                    future.set_exception(CommandAborted(f"{fn.__name__} skipped: {self.error!r}"))
+                    continue
+
+                try:
+                    result = await asyncio.to_thread(fn, *args, **kwargs)
+                except Exception as e:
+                    self.error = e
+                    if not future.cancelled():
+                        future.set_exception(e)
+                else:
+                    if not future.cancelled():
+                        future.set_result(result)
+            finally:
+                self.queue.task_done()
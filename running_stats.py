@@ -0,0 +1,102 @@
+# ---------------------------------------------
+# running_stats.py — O(1)-memory statistics for 2-D positions
+# Welford mean / variance plus a fixed-size reservoir for the
+# median and trimmed mean.
+# ---------------------------------------------
+import math
+import random
+
+
+class RunningStats:
+    def __init__(self, sketch_size=64, seed=None):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+
+        # Reservoir sample: a uniform sample of everything seen, fixed size
+        self.sketch_size = sketch_size
+        self.sketch = []
+        self.rng = random.Random(seed)
+
+    def add(self, x, y):
+        x, y = float(x), float(y)
+        self.n += 1
+
+        # Welford: numerically stable running mean and sum of squares
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        self.m2_x += dx * (x - self.mean_x)
+
+        dy = y - self.mean_y
+        self.mean_y += dy / self.n
+        self.m2_y += dy * (y - self.mean_y)
+
+        if self.sketch_size:
+            if len(self.sketch) < self.sketch_size:
+                self.sketch.append((x, y))
+            else:
+                k = self.rng.randrange(self.n)
+                if k < self.sketch_size:
+                    self.sketch[k] = (x, y)
+
+    # -----------------------------------------
+    # Estimates
+    # -----------------------------------------
+    @property
+    def mean(self):
+        return self.mean_x, self.mean_y
+
+    @property
+    def variance(self):
+        if self.n < 2:
+            return math.inf, math.inf
+        return self.m2_x / (self.n - 1), self.m2_y / (self.n - 1)
+
+    @property
+    def standard_error(self):
+        """Standard error of the mean, per axis (same unit as the samples)."""
+        var_x, var_y = self.variance
+        return math.sqrt(var_x / self.n), math.sqrt(var_y / self.n)
+
+    def median(self):
+        return self.trimmed_mean(0.5)
+
+    def trimmed_mean(self, trim=0.1):
+        """Mean of the sketch with `trim` cut off each end (trim=0.5 → median)."""
+        if not self.sketch:
+            return self.mean
+        return _trimmed([p[0] for p in self.sketch], trim), _trimmed([p[1] for p in self.sketch], trim)
+
+    def standard_error_mm(self, jacobian):
+        """
+        Largest per-axis standard error in mm, given the 2×2 local
+        px → mm Jacobian of the camera transform at the mean.
+        """
+        se_x, se_y = self.standard_error
+        if math.isinf(se_x):
+            return math.inf
+        (a, b), (c, d) = jacobian
+        return max(math.hypot(a * se_x, b * se_y), math.hypot(c * se_x, d * se_y))
+
+    def converged(self, max_se_px=None, max_se_mm=None, jacobian=None, min_samples=20):
+        if self.n < min_samples:
+            return False
+        if max_se_px is not None and max(self.standard_error) > max_se_px:
+            return False
+        if max_se_mm is not None and self.standard_error_mm(jacobian) > max_se_mm:
+            return False
+        return True
+
+
+def _trimmed(values, trim):
+    values = sorted(values)
+    n = len(values)
+    if trim >= 0.5:
+        mid = n // 2
+        return values[mid] if n % 2 else 0.5 * (values[mid - 1] + values[mid])
+
+    k = int(n * trim)
+    kept = values[k:n - k] or values
+    return sum(kept) / len(kept)
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from atomic_file import atomic_write
+
+
+def test_replaces_the_file(tmp_path):
+    path = str(tmp_path / "out.json")
+    with atomic_write(path) as f:
+        f.write("old")
+    with atomic_write(path, fsync=True) as f:
+        f.write("new")
+
+    assert open(path).read() == "new"
+    assert os.listdir(tmp_path) == ["out.json"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "out.bin")
+    with atomic_write(path, "wb") as f:
+        f.write(b"old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, "wb") as f:
+            f.write(b"half")
+            raise RuntimeError
+
+    assert open(path, "rb").read() == b"old"
+    assert os.listdir(tmp_path) == ["out.bin"]
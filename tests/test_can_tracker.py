@@ -0,0 +1,83 @@
+import numpy as np
+
+from can_tracker import CanTracker
+
+CANS = np.array([[100.0, 100.0], [300.0, 200.0], [500.0, 120.0]])
+
+
+def run(tracker, frames):
+    for dets in frames:
+        tracker.update(dets)
+    return tracker
+
+
+def test_ids_stay_stable_with_noise_and_order():
+    rng = np.random.default_rng(0)
+    tracker = CanTracker(gate=25.0, min_hits=5)
+    ids = None
+    for _ in range(30):
+        dets = CANS + rng.normal(0, 1.0, CANS.shape)
+        tracker.update(dets[rng.permutation(len(dets))])
+        by_position = [t.id for t in sorted(tracker.tracks, key=lambda t: t.mean[0])]
+        ids = ids or by_position
+        assert by_position == ids
+
+    confirmed = tracker.confirmed()
+    assert len(tracker.tracks) == 3
+    for t, can in zip(confirmed, CANS):                # sorted left → right
+        assert np.allclose(t.mean, can, atol=1.0)
+        assert t.hits == 30
+
+
+def test_confirmed_only_after_min_hits():
+    tracker = run(CanTracker(min_hits=10), [CANS] * 9)
+    assert tracker.confirmed() == []
+    tracker.update(CANS)
+    assert len(tracker.confirmed()) == 3
+
+
+def test_missed_track_survives_then_is_dropped():
+    tracker = run(CanTracker(max_misses=5, min_hits=1), [CANS] * 10)
+    run(tracker, [CANS[:2]] * 5)
+    assert len(tracker.tracks) == 3                    # 5 misses: still there
+    tracker.update(CANS[:2])
+    assert len(tracker.tracks) == 2
+
+
+def test_detection_outside_gate_starts_new_track():
+    tracker = run(CanTracker(gate=25.0, min_hits=1), [CANS[:1]] * 3)
+    tracker.update(CANS[:1] + [40.0, 0.0])
+    assert len(tracker.tracks) == 2
+
+
+def test_reused_detections_add_no_samples():
+    tracker = run(CanTracker(max_misses=3, min_hits=1), [CANS] * 10)
+    run(tracker, [CANS[:2]])
+    for _ in range(3):
+        tracker.update(CANS[:2], sample=False)
+
+    assert len(tracker.tracks) == 2                    # the vanished can keeps missing
+    assert all(t.n == 11 for t in tracker.tracks)      # no extra samples
+    assert all(t.misses == 0 for t in tracker.tracks)
+
+
+def test_nudged_can_restarts_its_stats():
+    tracker = run(CanTracker(gate=25.0, min_hits=1, window=10, jump=3.0), [CANS[:1]] * 50)
+    moved = CANS[:1] + [10.0, 0.0]                     # inside the gate: same track
+    run(tracker, [moved] * 10)
+
+    (track,) = tracker.tracks
+    assert np.allclose(track.position(), moved[0])
+    assert np.allclose(track.mean, moved[0])           # the 50 old samples are gone
+    assert track.n <= 10
+    assert track.hits == 60
+
+
+def test_position_ignores_single_outliers():
+    tracker = run(CanTracker(gate=25.0, min_hits=1, window=10, jump=3.0), [CANS[:1]] * 20)
+    tracker.update(CANS[:1] + [20.0, 0.0])
+    run(tracker, [CANS[:1]] * 3)
+
+    (track,) = tracker.tracks
+    assert np.allclose(track.position(), CANS[0])
+    assert track.n == 24                               # no restart
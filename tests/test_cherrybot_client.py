@@ -0,0 +1,83 @@
+import pytest
+
+from cherrybot_client import CherrybotClient
+from mock_cherrybot import start_mock_server
+
+
+@pytest.fixture
+def server():
+    server, url = start_mock_server(instant=True)
+    server.url = url
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = CherrybotClient(server.url, retries=3, backoff=0)
+    yield client
+    client.close()
+
+
+def test_get_is_retried_until_it_succeeds(server, client):
+    client.post_operator("Test", "test@example.com")
+    server.state.fail_next = 2
+
+    assert client.get_tcp() is not None
+    assert server.state.requests[("GET", "/tcp")] == 3
+
+
+def test_get_gives_up_after_the_retries(server, client):
+    client.post_operator("Test", "test@example.com")
+    server.state.fail_next = 10
+
+    assert client.get_tcp() is None
+    assert server.state.requests[("GET", "/tcp")] == 4   # first try + 3 retries
+
+
+def test_put_is_retried(server, client):
+    client.post_operator("Test", "test@example.com")
+    server.state.fail_next = 1
+
+    assert client.put_gripper(800) == 200
+    assert server.state.requests[("PUT", "/gripper")] == 2
+    assert server.state.gripper == 800
+
+
+def test_post_is_never_replayed(server, client):
+    server.state.fail_next = 1
+
+    token, code = client.post_operator("Test", "test@example.com")
+    assert (token, code) == (0, 503)
+    assert server.state.requests[("POST", "/operator")] == 1
+    assert server.state.operator is None
+
+
+def test_requests_share_one_connection(server, client):
+    client.post_operator("Test", "test@example.com")
+    for _ in range(20):
+        client.get_tcp()
+        client.get_gripper()
+
+    assert server.state.connections == 1
+
+
+def test_token_header(server, client):
+    assert client.get_tcp() is None                 # 401 without a token
+
+    token, code = client.post_operator("Test", "test@example.com")
+    assert code == 200
+    assert token == client.token == server.state.operator
+    assert client.get_tcp() is not None
+
+    client.delete_operator(token)
+    assert client.token is None
+    assert server.state.operator is None
+    assert client.get_tcp() is None
+
+
+def test_explicit_header_wins(server, client):
+    client.post_operator("Test", "test@example.com")
+    response = client.request("GET", "/tcp", headers={"Authentication": "wrong"})
+    assert response.status_code == 401
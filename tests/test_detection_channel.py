@@ -0,0 +1,44 @@
+import threading
+
+from detection_channel import DetectionSubscriber, publish, read_latest
+
+
+def channel(tmp_path):
+    return {"path": str(tmp_path / "detections.json"), "socket_path": str(tmp_path / "det.sock")}
+
+
+def test_publish_never_blocks_on_an_idle_subscriber(tmp_path):
+    paths = channel(tmp_path)
+    try:
+        with open("/proc/sys/net/unix/max_dgram_qlen") as f:
+            qlen = int(f.read())
+    except OSError:
+        qlen = 10
+
+    with DetectionSubscriber(**paths) as sub:
+        assert sub.sock is not None
+        done = threading.Event()
+
+        def flood():
+            for i in range(qlen + 20):
+                publish([(i, i, 1.0)], **paths)
+            done.set()
+
+        threading.Thread(target=flood, daemon=True).start()
+        assert done.wait(timeout=5.0), "publish() blocked on a full socket queue"
+
+        msg = sub.wait(newer_than=0, timeout=1.0)
+        assert msg["cans"][0]["u"] == qlen + 19       # the latest, not a queued one
+        assert read_latest(paths["path"]) == msg
+
+
+def test_wait_returns_only_newer_messages(tmp_path):
+    paths = channel(tmp_path)
+    with DetectionSubscriber(**paths) as sub:
+        first = publish([(1, 2, 0.5)], **paths)
+        assert sub.wait(newer_than=0, timeout=1.0)["seq"] == first["seq"]
+        assert sub.wait(newer_than=first["timestamp"], timeout=0.1) is None
+
+        threading.Timer(0.05, publish, args=([(3, 4, 0.9)],), kwargs=paths).start()
+        msg = sub.wait(newer_than=first["timestamp"], timeout=2.0)
+        assert msg["cans"] == [{"u": 3.0, "v": 4.0, "confidence": 0.9}]
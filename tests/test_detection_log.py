@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from detection_log import RECORD, DetectionLog, load_detections
+
+
+@pytest.mark.parametrize("ext", ["csv", "npz"])
+def test_round_trip(tmp_path, ext):
+    path = str(tmp_path / f"detections.{ext}")
+    with DetectionLog(path) as log:
+        log.add(1.5, "circle", [10.0, 20.0], [30.0, 40.0], [25.0, 26.0], 0.9)
+        log.flush()
+        log.add(2.0, "black_rectangle", [50.0], [60.0], [1200.0])
+
+    data = load_detections(path)
+    assert data.dtype == RECORD
+    assert data["type"].tolist() == [0, 0, 1]
+    assert np.allclose(data["x"], [10.0, 20.0, 50.0])
+    assert np.allclose(data["size"], [25.0, 26.0, 1200.0])
+    assert np.allclose(data["confidence"], [0.9, 0.9, 1.0])
+
+
+@pytest.mark.parametrize("ext", ["csv", "npz"])
+def test_empty_log(tmp_path, ext):
+    path = str(tmp_path / f"detections.{ext}")
+    with DetectionLog(path) as log:
+        log.add(1.0, "circle", [], [], [])
+
+    data = load_detections(path)
+    assert data.dtype == RECORD
+    assert len(data) == 0
@@ -0,0 +1,123 @@
+import pytest
+
+import gripper as gripper_module
+from cherrybot_client import CherrybotClient
+from gripper import GRIPPER_CLOSED, GRIPPER_OPEN, Gripper
+from mock_cherrybot import start_mock_server
+
+
+class FakeClient:
+    def __init__(self, value=GRIPPER_OPEN):
+        self.value = value
+        self.code = 200
+        self.gets = 0
+        self.puts = []
+
+    def get_gripper(self):
+        self.gets += 1
+        return self.value
+
+    def put_gripper(self, value):
+        self.puts.append(value)
+        if self.code == 200:
+            self.value = value
+        return self.code
+
+
+def test_toggle_reads_once_then_uses_the_cache():
+    client = FakeClient(GRIPPER_OPEN)
+    g = Gripper(client)
+    g.sync()
+    for _ in range(4):
+        g.toggle()
+
+    assert client.puts == [GRIPPER_CLOSED, GRIPPER_OPEN, GRIPPER_CLOSED, GRIPPER_OPEN]
+    assert client.gets == 1
+
+
+def test_open_close_never_read():
+    client = FakeClient()
+    g = Gripper(client)
+    g.close()
+    g.open()
+    assert client.gets == 0
+    assert g.is_open() and client.gets == 0
+
+
+def test_failed_command_forces_a_resync():
+    client = FakeClient(GRIPPER_CLOSED)
+    g = Gripper(client)
+    g.sync()
+
+    client.code = 503
+    assert g.open() is False
+    assert g.value is None
+
+    client.code = 200
+    g.toggle()                                   # re-reads: still closed → opens
+    assert client.gets == 2
+    assert client.value == GRIPPER_OPEN
+
+
+def test_exception_invalidates_the_cache():
+    class Broken(FakeClient):
+        def put_gripper(self, value):
+            raise ConnectionError
+
+    g = Gripper(Broken())
+    g.sync()
+    with pytest.raises(ConnectionError):
+        g.close()
+    assert g.stale
+
+
+def test_stale_cache_is_reread(monkeypatch):
+    client = FakeClient(GRIPPER_OPEN)
+    g = Gripper(client, stale_after=10.0)
+    now = [100.0]
+    monkeypatch.setattr(gripper_module.time, "monotonic", lambda: now[0])
+
+    g.close()
+    client.value = GRIPPER_OPEN                  # someone else opened it
+    now[0] += 5
+    g.toggle()
+    assert client.value == GRIPPER_OPEN and client.gets == 0   # cache still trusted
+
+    client.value = GRIPPER_CLOSED
+    now[0] += 11
+    g.toggle()
+    assert client.gets == 1
+    assert client.value == GRIPPER_OPEN
+
+
+def test_holding():
+    client = FakeClient()
+    assert Gripper(client).holding() is None      # confirmation off
+    assert client.gets == 0
+
+    g = Gripper(client, confirm=True)
+    client.value = 760                           # fingers stopped on a can
+    assert g.holding() is True
+    client.value = GRIPPER_CLOSED                # closed on nothing
+    assert g.holding() is False
+    client.value = None                          # read failed
+    assert g.holding() is None
+
+
+def test_against_the_mock():
+    server, url = start_mock_server(instant=True)
+    client = CherrybotClient(url, backoff=0)
+    try:
+        client.post_operator("Test", "test@example.com")
+        g = Gripper(client)
+        g.sync()
+        g.toggle()
+        g.toggle()
+
+        assert server.state.gripper == GRIPPER_OPEN
+        assert server.state.requests[("GET", "/gripper")] == 1
+        assert server.state.requests[("PUT", "/gripper")] == 2
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
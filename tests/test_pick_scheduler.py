@@ -0,0 +1,49 @@
+import itertools
+import math
+import random
+
+from pick_scheduler import schedule_picks, travel
+
+STACK = [(0, -400), (70, -400), (35, -400)]
+HOME = (0, -450, 300)
+
+
+def brute_force(cans, stack, start):
+    """Cheapest plan over every slot order (top last) and every can choice."""
+    n = min(len(cans), len(stack))
+    slots = stack[:n]
+    best = math.inf
+    for order in itertools.permutations(range(n - 1)):
+        order += (n - 1,)
+        for picked in itertools.permutations(range(len(cans)), n):
+            best = min(best, travel(list(zip(order, picked)), cans, slots, start))
+    return best
+
+
+def test_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(50):
+        cans = [(rng.uniform(-200, 300), rng.uniform(-350, -100)) for _ in range(rng.randint(3, 6))]
+        plan, cost = schedule_picks(cans, STACK, HOME)
+
+        assert math.isclose(cost, brute_force(cans, STACK, HOME))
+        assert math.isclose(cost, travel(plan, cans, STACK, HOME))
+
+
+def test_plan_shape():
+    cans = [(100, -200), (-100, -250), (200, -300), (0, -150)]
+    plan, _ = schedule_picks(cans, STACK, HOME)
+
+    assert len(plan) == 3
+    assert plan[-1][0] == 2                          # top slot last
+    assert sorted(slot for slot, _ in plan) == [0, 1, 2]
+    assert len({can for _, can in plan}) == 3        # every can used once
+
+
+def test_fewer_cans_than_slots():
+    plan, _ = schedule_picks([(100, -200)], STACK, HOME)
+    assert plan == [(0, 0)]
+
+
+def test_no_cans():
+    assert schedule_picks([], STACK, HOME) == ([], 0.0)
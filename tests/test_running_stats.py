@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+from running_stats import RunningStats
+
+
+def filled(points, **kwargs):
+    stats = RunningStats(**kwargs)
+    for x, y in points:
+        stats.add(x, y)
+    return stats
+
+
+def test_mean_variance_and_standard_error_match_numpy():
+    rng = np.random.default_rng(0)
+    pts = rng.normal([400.0, 250.0], [2.0, 0.5], size=(500, 2))
+    stats = filled(pts)
+
+    assert np.allclose(stats.mean, pts.mean(axis=0))
+    assert np.allclose(stats.variance, pts.var(axis=0, ddof=1))
+    assert np.allclose(stats.standard_error, pts.std(axis=0, ddof=1) / math.sqrt(len(pts)))
+
+
+def test_large_offset_stays_accurate():
+    # Welford: no catastrophic cancellation for pixel coordinates far from 0
+    pts = [(1e6 + d, 1e6 - d) for d in (0.1, 0.2, 0.3, 0.4)]
+    assert np.allclose(filled(pts).variance, (np.var([0.1, 0.2, 0.3, 0.4], ddof=1),) * 2)
+
+
+def test_variance_needs_two_samples():
+    stats = filled([(1.0, 2.0)])
+    assert stats.variance == (math.inf, math.inf)
+    assert not stats.converged(max_se_px=1.0, min_samples=1)
+
+
+def test_sketch_is_bounded_and_median_is_robust():
+    rng = np.random.default_rng(1)
+    pts = np.vstack([rng.normal(100.0, 0.5, size=(990, 2)), np.full((10, 2), 10_000.0)])
+    stats = filled(rng.permutation(pts), sketch_size=64, seed=0)
+
+    assert len(stats.sketch) == 64
+    assert np.allclose(stats.median(), (100.0, 100.0), atol=0.5)
+    assert stats.mean[0] > 150                       # the outliers drag the mean
+
+
+def test_median_of_small_samples():
+    stats = filled([(1, 5), (3, 1), (2, 9), (10, 3)])
+    assert stats.median() == (2.5, 4.0)
+    assert stats.trimmed_mean(0.25) == (2.5, 4.0)
+
+
+def test_converged():
+    pts = [(100.0 + 0.01 * (i % 3), 50.0) for i in range(30)]
+    stats = filled(pts)
+    assert stats.converged(max_se_px=0.1, min_samples=20)
+    assert not stats.converged(max_se_px=0.1, min_samples=40)
+
+    J = [[2.0, 0.0], [0.0, 2.0]]                     # 2 mm per px
+    assert math.isclose(stats.standard_error_mm(J), 2 * max(stats.standard_error))
@@ -0,0 +1,87 @@
+# ---------------------------------------------
+# trajectory.py — compile pick-and-place jobs into one waypoint list
+# ---------------------------------------------
+import math
+from collections import namedtuple
+
+# Estimated arm speed for the "speed": 200 we send with every move (mm/s)
+SPEED = 200.0
+# Time to come to a full stop and settle at a stop point (s)
+STOP_OVERHEAD = 0.5
+# Time for one gripper open / close (s)
+GRIPPER_TIME = 1.0
+
+# A via point is passed as soon as the TCP is this close (mm);
+# stop points (grab / release / descents) need full arrival.
+BLEND_RADIUS = 15.0
+
+# x, y, z in robot mm. stop: arrive fully before continuing.
+# gripper: None, "close" or "open", fired after arriving.
+Waypoint = namedtuple("Waypoint", "x y z stop gripper label")
+
+# One can: pick at (x_can, y_can, z_pick), place at (x_stack, y_stack, z_place)
+Job = namedtuple("Job", "x_can y_can z_pick x_stack y_stack z_place")
+
+
+class Plan:
+    def __init__(self, start, waypoints):
+        self.start = start
+        self.waypoints = waypoints
+
+    def path_length(self):
+        total = 0.0
+        prev = self.start
+        for wp in self.waypoints:
+            total += math.dist(prev, (wp.x, wp.y, wp.z))
+            prev = (wp.x, wp.y, wp.z)
+        return total
+
+    def estimated_time(self, speed=SPEED):
+        stops = sum(1 for wp in self.waypoints if wp.stop)
+        grips = sum(1 for wp in self.waypoints if wp.gripper)
+        return self.path_length() / speed + stops * STOP_OVERHEAD + grips * GRIPPER_TIME
+
+    def summary(self):
+        return (f"{len(self.waypoints)} waypoints, "
+                f"{self.path_length():.0f} mm, ~{self.estimated_time():.1f} s")
+
+
+def plan_stack(jobs, start, z_lift, merge_lifts=True, retreat=72.0, more_jobs=False):
+    """
+    Builds the waypoint list for a sequence of Jobs starting at `start` (x, y, z).
+
+    merge_lifts: after a release the arm only backs off `retreat` mm above the
+    placed can and then flies straight to the next can, instead of climbing to
+    z_lift over the stack and then crossing at z_lift.
+    more_jobs: another plan follows this one, so its last lift can be merged too.
+    """
+    wps = []
+
+    for k, job in enumerate(jobs):
+        last = k == len(jobs) - 1 and not more_jobs
+
+        wps.append(Waypoint(job.x_can, job.y_can, z_lift, True, None, "above can"))
+        wps.append(Waypoint(job.x_can, job.y_can, job.z_pick, True, "close", "grab"))
+        wps.append(Waypoint(job.x_can, job.y_can, z_lift, False, None, "lift"))
+
+        wps.append(Waypoint(job.x_stack, job.y_stack, z_lift, True, None, "above stack"))
+        wps.append(Waypoint(job.x_stack, job.y_stack, job.z_place, True, "open", "release"))
+
+        z_away = z_lift
+        if merge_lifts and not last:
+            z_away = min(z_lift, job.z_place + retreat)
+        wps.append(Waypoint(job.x_stack, job.y_stack, z_away, False, None, "lift away"))
+
+    return Plan(start, _drop_duplicates(start, wps))
+
+
+def _drop_duplicates(start, wps):
+    """Removes waypoints the arm is already at (e.g. the start pose above the first can)."""
+    out = []
+    prev = start
+    for wp in wps:
+        if math.dist(prev, (wp.x, wp.y, wp.z)) < 1e-6 and wp.gripper is None:
+            continue
+        out.append(wp)
+        prev = (wp.x, wp.y, wp.z)
+    return out
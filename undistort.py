@@ -0,0 +1,239 @@
+# ---------------------------------------------
+# undistort.py — camera lens correction (opt-in)
+# Intrinsics come from checkerboard photos and are stored in
+# intrinsics.json; without that file everything here is the identity.
+#
+#   python undistort.py calibrate checkerboards/ --board 9x6 --square 25
+#   python undistort.py check
+#
+# Two ways to use it:
+#   undistort_points()  only the detected centres, one vectorized call (cheap)
+#   undistort_frame()   whole frame through cv2.remap; the lookup tables of
+#                       initUndistortRectifyMap are cached in undistort_maps.npz
+# All pixel coordinates are in FRAME_SIZE (960×540); the new camera matrix
+# equals K, so undistorted pixels stay on the same scale.
+# ---------------------------------------------
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from atomic_file import atomic_write
+
+FRAME_SIZE = (960, 540)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INTRINSICS_FILE = os.path.join(HERE, "intrinsics.json")
+MAPS_FILE = os.path.join(HERE, "undistort_maps.npz")
+
+BOARD_SIZE = (9, 6)       # inner corners of the checkerboard
+SQUARE_SIZE = 25.0        # mm (only scales the extrinsics, not K)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+UNDISTORT_ITERATIONS = 20
+
+_intrinsics = None
+_loaded = False
+_maps = None
+
+
+# -----------------------------------------
+# Calibration
+# -----------------------------------------
+def calibrate_intrinsics(folder, board=BOARD_SIZE, square=SQUARE_SIZE, path=INTRINSICS_FILE):
+    """Finds the checkerboard in every image of `folder`, fits K + distortion and saves them."""
+    import cv2
+
+    objp = np.zeros((board[0] * board[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:board[0], 0:board[1]].T.reshape(-1, 2) * square
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 1e-3)
+
+    obj_points, img_points, used = [], [], []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        img = cv2.imread(os.path.join(folder, name))
+        if img is None:
+            continue
+        gray = cv2.cvtColor(cv2.resize(img, FRAME_SIZE), cv2.COLOR_BGR2GRAY)
+
+        found, corners = cv2.findChessboardCorners(gray, board)
+        if not found:
+            print(f"   {name}: no board")
+            continue
+        corners = cv2.cornerSubPix(gray, corners, (5, 5), (-1, -1), criteria)
+        obj_points.append(objp)
+        img_points.append(corners)
+        used.append(name)
+
+    if len(used) < 3:
+        raise ValueError(f"Checkerboard found in {len(used)} images, need at least 3.")
+
+    rms, K, dist, _, _ = cv2.calibrateCamera(obj_points, img_points, FRAME_SIZE, None, None)
+    return save_intrinsics(K, dist, rms, used, board, path)
+
+
+def save_intrinsics(K, dist, rms, images, board=BOARD_SIZE, path=INTRINSICS_FILE):
+    calib = {
+        "image_size": list(FRAME_SIZE),
+        "K": np.asarray(K, dtype=np.float64).tolist(),
+        "dist": np.asarray(dist, dtype=np.float64).ravel().tolist(),
+        "rms_px": float(rms),
+        "board": list(board),
+        "images": list(images),
+    }
+
+    with atomic_write(path) as f:
+        json.dump(calib, f, indent=2)
+
+    global _loaded, _maps
+    _loaded, _maps = False, None
+    return calib
+
+
+def load_intrinsics(path=INTRINSICS_FILE):
+    """The stored intrinsics (K, dist as arrays), or None when the lens is not calibrated."""
+    global _intrinsics, _loaded
+    if _loaded:
+        return _intrinsics
+
+    try:
+        with open(path) as f:
+            calib = json.load(f)
+        calib["K"] = np.asarray(calib["K"], dtype=np.float64)
+        calib["dist"] = np.asarray(calib["dist"], dtype=np.float64)
+        calib["id"] = hashlib.sha1(json.dumps([calib["K"].tolist(), calib["dist"].tolist()]).encode()).hexdigest()
+        _intrinsics = calib
+    except (FileNotFoundError, ValueError, KeyError):
+        _intrinsics = None
+    _loaded = True
+    return _intrinsics
+
+
+def intrinsics_id():
+    """Fingerprint of the active intrinsics (None = no lens correction)."""
+    calib = load_intrinsics()
+    return calib["id"] if calib else None
+
+
+# -----------------------------------------
+# Points
+# -----------------------------------------
+def undistort_points(points):
+    """Raw pixel coords (N×2) → undistorted pixel coords. Identity without intrinsics."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    calib = load_intrinsics()
+    if calib is None or len(pts) == 0:
+        return pts
+
+    import cv2
+    K = calib["K"]
+    # more iterations than the default 5: converges at the frame corners too
+    criteria = (cv2.TERM_CRITERIA_COUNT | cv2.TERM_CRITERIA_EPS, UNDISTORT_ITERATIONS, 1e-9)
+    out = cv2.undistortPoints(pts.reshape(-1, 1, 2), K, calib["dist"], None, None, K, criteria)
+    return out.reshape(-1, 2)
+
+
+def distort_points(points):
+    """Undistorted pixel coords (N×2) → raw pixel coords (the lens model applied forward)."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    calib = load_intrinsics()
+    if calib is None or len(pts) == 0:
+        return pts
+
+    K = calib["K"]
+    k1, k2, p1, p2, k3 = (list(calib["dist"]) + [0.0] * 5)[:5]
+    x = (pts[:, 0] - K[0, 2]) / K[0, 0]
+    y = (pts[:, 1] - K[1, 2]) / K[1, 1]
+
+    r2 = x * x + y * y
+    radial = 1 + r2 * (k1 + r2 * (k2 + r2 * k3))
+    xd = x * radial + 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+    yd = y * radial + p1 * (r2 + 2 * y * y) + 2 * p2 * x * y
+    return np.column_stack([xd * K[0, 0] + K[0, 2], yd * K[1, 1] + K[1, 2]])
+
+
+# -----------------------------------------
+# Frames
+# -----------------------------------------
+def undistort_maps(path=MAPS_FILE):
+    """(map1, map2) for cv2.remap, computed once per set of intrinsics and cached on disk."""
+    global _maps
+    calib = load_intrinsics()
+    if calib is None:
+        return None
+    if _maps is not None and _maps[0] == calib["id"]:
+        return _maps[1:]
+
+    try:
+        with np.load(path) as f:
+            if str(f["id"]) == calib["id"]:
+                _maps = (calib["id"], f["map1"], f["map2"])
+                return _maps[1:]
+    except (FileNotFoundError, ValueError, KeyError, OSError):
+        pass
+
+    import cv2
+    K = calib["K"]
+    # fixed-point maps: smaller and the fastest remap path
+    map1, map2 = cv2.initUndistortRectifyMap(K, calib["dist"], None, K, FRAME_SIZE, cv2.CV_16SC2)
+    with atomic_write(path, "wb") as f:
+        np.savez(f, id=calib["id"], map1=map1, map2=map2)
+
+    _maps = (calib["id"], map1, map2)
+    return map1, map2
+
+
+def undistort_frame(frame):
+    """FRAME_SIZE frame → undistorted frame. Returns the input unchanged without intrinsics."""
+    maps = undistort_maps()
+    if maps is None:
+        return frame
+
+    import cv2
+    return cv2.remap(frame, maps[0], maps[1], cv2.INTER_LINEAR)
+
+
+# -----------------------------------------
+# Command line
+# -----------------------------------------
+def _check():
+    calib = load_intrinsics()
+    if calib is None:
+        print("No intrinsics.json — lens correction is off.")
+        return
+
+    w, h = FRAME_SIZE
+    grid = np.array([(x, y) for x in (0, w / 4, w / 2, 3 * w / 4, w - 1) for y in (0, h / 2, h - 1)])
+    shift = np.hypot(*(undistort_points(grid) - grid).T)
+    roundtrip = np.abs(distort_points(undistort_points(grid)) - grid).max()
+
+    print(f"RMS {calib['rms_px']:.3f} px from {len(calib['images'])} images")
+    print(f"Correction: centre {shift[7]:.2f} px, corners up to {shift.max():.2f} px")
+    print(f"Undistort → distort round trip: {roundtrip:.4f} px"
+          + ("  (large: the boards did not cover the whole frame)" if roundtrip > 0.1 else ""))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Lens calibration and undistortion")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    cal = sub.add_parser("calibrate", help="fit intrinsics from checkerboard images")
+    cal.add_argument("folder")
+    cal.add_argument("--board", default=f"{BOARD_SIZE[0]}x{BOARD_SIZE[1]}", help="inner corners, e.g. 9x6")
+    cal.add_argument("--square", type=float, default=SQUARE_SIZE, help="square size in mm")
+    sub.add_parser("check", help="show how much the correction moves points")
+    args = p.parse_args()
+
+    if args.cmd == "calibrate":
+        board = tuple(int(n) for n in args.board.lower().split("x"))
+        calib = calibrate_intrinsics(args.folder, board, args.square)
+        print(f"📷 Intrinsics saved from {len(calib['images'])} images, RMS {calib['rms_px']:.3f} px")
+        undistort_maps()
+        print("🗺️ Remap tables cached; the homography is refit from its stored points on next use.")
+    _check()
+
+
+if __name__ == "__main__":
+    main()
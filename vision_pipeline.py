@@ -0,0 +1,301 @@
+# ---------------------------------------------
+# vision_pipeline.py — detection spread over several worker processes
+#   capture  (feeder thread)   resizes each frame straight into a free
+#                              slot of a shared-memory ring buffer
+#   preprocess + detect        worker processes read the slot in place;
+#                              only the small results are pickled back
+#   sink     (caller)          results come out in capture order
+# Frames never go through a pipe. Workers run OpenCV single-threaded so
+# N workers use N cores. With a ChangeGate, static frames never reach a
+# worker and partly changed ones are only re-detected in those regions.
+#
+#   python vision_pipeline.py                 # throughput for 1..cores workers
+#   python vision_pipeline.py --workers 4 --frames 300
+# ---------------------------------------------
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from change_gate import FULL, STATIC
+from object_detection import FRAME_SIZE, detect_objects, detect_objects_in, merge_objects
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)   # one core left for capture + sink
+SLOTS_PER_WORKER = 2                                   # frames in flight per worker
+
+
+class WorkerError(RuntimeError):
+    """A detection worker raised (the message carries its traceback) or died."""
+
+
+def _context():
+    # fork: workers start fast and the calling script is not re-imported
+    methods = mp.get_all_start_methods()
+    return mp.get_context("fork" if "fork" in methods else "spawn")
+
+
+def _worker(shm_name, shape, tasks, results, detect, detect_regions):
+    cv2.setNumThreads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, regions = task
+            t0 = time.perf_counter()
+            try:
+                if regions is None:
+                    out = detect(frames[slot])
+                else:
+                    out = detect_regions(frames[slot], regions)
+            except Exception:
+                # the sink waits for every seq: report the failure instead of dropping it
+                out = WorkerError(f"detection of frame {seq} failed:\n{traceback.format_exc()}")
+            results.put((seq, out, time.perf_counter() - t0))
+    finally:
+        del frames
+        shm.close()
+
+
+class DetectionPipeline:
+    """
+    with DetectionPipeline(workers=4) as pipe:
+        for seq, ts, frame, (circles, boxes) in pipe.run(frames):   # frames: (ts, BGR)
+            ...   # `frame` is only valid until the next iteration
+    Start it before opening the camera, so the workers fork without
+    the capture thread.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, detect=detect_objects, slots=None, frame_size=FRAME_SIZE,
+                 gate=None, detect_regions=detect_objects_in, merge=merge_objects):
+        self.workers = max(int(workers), 1)
+        self.detect = detect
+        self.detect_regions = detect_regions
+        self.merge = merge
+        self.gate = gate        # change_gate.ChangeGate or None
+        self.n_slots = slots or self.workers * SLOTS_PER_WORKER
+        self.shape = (self.n_slots, frame_size[1], frame_size[0], 3)
+        self.frame_size = frame_size
+
+        self.shm = None
+        self.procs = []
+        self.free = queue.Queue()       # slot indices the feeder may write
+        self.pending = {}               # seq → (slot, ts, regions), submitted, not yet yielded
+
+        # metrics
+        self.submitted = 0
+        self.completed = 0
+        self.reorder_peak = 0
+        self.busy_time = 0.0            # s spent detecting, summed over workers
+        self.t_start = None
+
+    # -----------------------------------------
+    # Lifecycle
+    # -----------------------------------------
+    def start(self):
+        ctx = _context()
+        size = int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        for slot in range(self.n_slots):
+            self.free.put(slot)
+
+        self.procs = [
+            ctx.Process(target=_worker, args=(self.shm.name, self.shape, self.tasks, self.results,
+                                                  self.detect, self.detect_regions),
+                        daemon=True)
+            for _ in range(self.workers)
+        ]
+        for p in self.procs:
+            p.start()
+        return self
+
+    def stop(self):
+        for _ in self.procs:
+            self.tasks.put(None)
+        for p in self.procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self.procs = []
+
+        if self.shm is not None:
+            del self.frames
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # -----------------------------------------
+    # Capture side
+    # -----------------------------------------
+    def submit(self, ts, frame, timeout=None):
+        """Copies (and resizes) the frame into a free slot and queues it. Blocks while all slots are busy."""
+        slot = self.free.get(timeout=timeout)
+        if frame.shape[1::-1] == self.frame_size:
+            self.frames[slot] = frame
+        else:
+            cv2.resize(frame, self.frame_size, dst=self.frames[slot])
+
+        mode, regions = self.gate.check(self.frames[slot]) if self.gate else (FULL, [])
+
+        self.submitted += 1
+        seq = self.submitted
+        self.pending[seq] = (slot, ts, regions)
+        if mode == STATIC:
+            self.results.put((seq, None, 0.0))     # nothing to detect, the sink reuses the last result
+        else:
+            self.tasks.put((seq, slot, regions if mode != FULL else None))
+        return seq
+
+    def _feed(self, frames, stop):
+        try:
+            for ts, frame in frames:
+                while not stop.is_set():
+                    try:
+                        self.submit(ts, frame, timeout=0.1)
+                        break
+                    except queue.Empty:
+                        continue      # all slots busy, check for stop again
+                if stop.is_set():
+                    break
+        finally:
+            self.fed = True
+
+    # -----------------------------------------
+    # Sink side
+    # -----------------------------------------
+    def run(self, frames):
+        """
+        Feeds `frames` ((ts, frame) pairs) from a background thread and yields
+        (seq, ts, frame, result) in capture order.
+        """
+        self.t_start = time.perf_counter()
+        self.fed = False
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(frames, stop), daemon=True)
+        feeder.start()
+
+        done = {}
+        last = None
+        next_seq = self.completed + 1
+        try:
+            while not (self.fed and next_seq > self.submitted):
+                try:
+                    seq, out, busy = self.results.get(timeout=0.1)
+                except queue.Empty:
+                    dead = [p.exitcode for p in self.procs if not p.is_alive()]
+                    if dead:
+                        raise WorkerError(f"{len(dead)} detection worker(s) died, exit codes {dead}")
+                    continue
+                if isinstance(out, WorkerError):
+                    raise out
+                done[seq] = out
+                self.busy_time += busy
+                self.reorder_peak = max(self.reorder_peak, len(done))
+
+                # hand out everything that is now in order
+                while next_seq in done:
+                    slot, ts, regions = self.pending.pop(next_seq)
+                    out = done.pop(next_seq)
+                    if out is None:
+                        out = last
+                    elif regions:
+                        out = self.merge(last, out, regions)
+                    last = out
+                    self.completed = next_seq
+                    yield next_seq, ts, self.frames[slot], out
+                    self.free.put(slot)     # consumer is done with the frame
+                    next_seq += 1
+        finally:
+            stop.set()
+            feeder.join(timeout=1.0)
+
+    # -----------------------------------------
+    # Metrics
+    # -----------------------------------------
+    def metrics(self):
+        elapsed = time.perf_counter() - self.t_start if self.t_start else 0.0
+        try:
+            queued = self.tasks.qsize()
+        except NotImplementedError:   # macOS
+            queued = None
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "in_flight": self.submitted - self.completed,
+            "task_queue": queued,
+            "free_slots": self.free.qsize(),
+            "reorder_peak": self.reorder_peak,
+            "fps": self.completed / elapsed if elapsed else 0.0,
+            "worker_utilisation": self.busy_time / (elapsed * self.workers) if elapsed else 0.0,
+            "skipped": self.gate.skipped if self.gate else 0,
+            "partial": self.gate.partial if self.gate else 0,
+        }
+
+    def report(self):
+        m = self.metrics()
+        queued = "?" if m["task_queue"] is None else m["task_queue"]
+        text = (f"{m['fps']:.1f} FPS with {m['workers']} workers, {m['in_flight']} in flight "
+                f"(queued {queued}, free slots {m['free_slots']}, reorder peak {m['reorder_peak']}), "
+                f"workers {m['worker_utilisation']:.0%} busy")
+        if self.gate is not None:
+            text += f"; gate: {self.gate.report()}"
+        return text
+
+
+# -----------------------------------------
+# Scaling benchmark
+# -----------------------------------------
+def main():
+    from bench_vision import synthetic
+
+    p = argparse.ArgumentParser(description="Throughput of the multi-process detection pipeline")
+    p.add_argument("--workers", type=int, nargs="*", help="worker counts to try (default 1..cores)")
+    p.add_argument("--frames", type=int, default=200)
+    args = p.parse_args()
+
+    frames, _ = synthetic(8)
+    frames = [f for _, f in frames]
+    counts = args.workers or list(range(1, (os.cpu_count() or 1) + 1))
+
+    # single process reference
+    small = [cv2.resize(f, FRAME_SIZE) for f in frames]
+    t0 = time.perf_counter()
+    for k in range(args.frames):
+        detect_objects(small[k % len(small)])
+    base = args.frames / (time.perf_counter() - t0)
+    print(f"serial:     {base:.1f} FPS")
+
+    for n in counts:
+        with DetectionPipeline(workers=n) as pipe:
+            stream = ((k, frames[k % len(frames)]) for k in range(args.frames))
+            last = 0
+            for seq, *_ in pipe.run(stream):
+                assert seq == last + 1, "results out of order"
+                last = seq
+            m = pipe.metrics()
+            print(f"{n:>2} workers: {m['fps']:.1f} FPS ({m['fps'] / base:.2f}× serial) — {pipe.report()}")
+
+
+if __name__ == "__main__":
+    main()